@@ -6,14 +6,15 @@ from typing import Optional, List
 import asyncio
 
 from web_ui.backend.services.caption_service import get_caption_service
+from web_ui.backend.responses import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 # Data Models
 class LoadModelRequest(BaseModel):
     model_id: str
     quantization: str = "8-bit" # "None", "8-bit", "4-bit"
-    attn_impl: str = "flash_attention_2" # "flash_attention_2", "eager"
+    attn_impl: str = "flash_attention_2" # "flash_attention_2", "sdpa", "eager"
 
 class CaptionRequest(BaseModel):
     media_path: str
@@ -27,7 +28,7 @@ class BatchProcessRequest(BaseModel):
     skip_existing: bool = False
     max_tokens: int = 128
     resolution_mode: str = "auto"
-    batch_size: int = 1 # Not fully used in generator logic but kept for interface compatibility
+    batch_size: int = 4 # Files captioned per model.generate call
 
 # Global state for batch job
 current_batch_generator = None
@@ -92,7 +93,8 @@ async def start_batch(req: BatchProcessRequest, background_tasks: BackgroundTask
         req.prompt,
         req.skip_existing,
         req.max_tokens,
-        req.resolution_mode
+        req.resolution_mode,
+        req.batch_size
     )
     
     batch_status["active"] = True
@@ -69,7 +69,7 @@ async def list_presets(
                 name=config_file.stem,
                 path=str(config_file.absolute()),
                 description=None,  # Could parse from config if available
-                last_modified=datetime.fromtimestamp(stat.st_mtime)
+                last_modified=int(stat.st_mtime * 1000)
             )
             presets.append(preset_info)
         except Exception:
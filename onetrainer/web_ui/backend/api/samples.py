@@ -256,7 +256,7 @@ def _discover_samples(samples_dir: Path, limit: Optional[int] = None) -> List[Sa
                     id=sample_file.stem,
                     path=str(sample_file.absolute()),
                     filename=sample_file.name,
-                    timestamp=datetime.fromtimestamp(stat.st_mtime),
+                    timestamp=int(stat.st_mtime * 1000),
                     epoch=int(match.group(2)) if match else None,
                     step=int(match.group(1)) if match else None,
                     prompt=None,  # Not available from filename
@@ -5,7 +5,9 @@ from typing import List, Optional
 from pathlib import Path
 import json
 
-router = APIRouter(prefix="/settings", tags=["settings"])
+from web_ui.backend.responses import FastJSONResponse
+
+router = APIRouter(prefix="/settings", tags=["settings"], default_response_class=FastJSONResponse)
 
 MODELS_CONFIG_PATH = Path.home() / ".cache" / "onetrainer" / "models_config.json"
 
@@ -7,7 +7,9 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-router = APIRouter(tags=["tensorboard"])
+from web_ui.backend.responses import FastJSONResponse
+
+router = APIRouter(tags=["tensorboard"], default_response_class=FastJSONResponse)
 
 # Track TensorBoard process
 _tensorboard_process: Optional[subprocess.Popen] = None
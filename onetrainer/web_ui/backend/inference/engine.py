@@ -28,11 +28,23 @@ from typing import Any, Dict, List, Optional, Union
 import torch
 from fastapi import FastAPI, File, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from PIL import Image
 from pydantic import BaseModel, Field
 
+try:
+    from .models import (
+        GeneratedImage, GenerateRequest, GenerationMode, LoadModelRequest,
+        LoRAConfig, ModelInfo, ModelType, Sampler, SystemStatus,
+    )
+except ImportError:
+    # Run directly as a script from this directory
+    from models import (
+        GeneratedImage, GenerateRequest, GenerationMode, LoadModelRequest,
+        LoRAConfig, ModelInfo, ModelType, Sampler, SystemStatus,
+    )
+
 # Add OneTrainer to path for model loading
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -42,78 +54,6 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 # Configuration & Types
 # ============================================================================
 
-class ModelType(str, Enum):
-    # FLUX
-    FLUX_DEV = "flux_dev"
-    FLUX_SCHNELL = "flux_schnell"
-    FLUX_2_DEV = "flux_2_dev"
-    FLUX_FILL = "flux_fill"
-    # Stable Diffusion
-    SD_15 = "sd_15"
-    SD_21 = "sd_21"
-    SDXL = "sdxl"
-    SDXL_TURBO = "sdxl_turbo"
-    SD_3 = "sd_3"
-    SD_35 = "sd_35"
-    SD_35_TURBO = "sd_35_turbo"
-    # Other
-    PIXART_ALPHA = "pixart_alpha"
-    PIXART_SIGMA = "pixart_sigma"
-    SANA = "sana"
-    CHROMA = "chroma"
-    HIDREAM = "hidream"
-    # Z-Image (Alibaba)
-    Z_IMAGE = "z_image"
-    Z_IMAGE_TURBO = "z_image_turbo"
-    Z_IMAGE_EDIT = "z_image_edit"
-    # Qwen
-    QWEN_IMAGE = "qwen_image"
-    QWEN_IMAGE_EDIT = "qwen_image_edit"
-    # Lumina
-    LUMINA = "lumina"
-    LUMINA_2 = "lumina_2"
-    # OmniGen
-    OMNIGEN = "omnigen"
-    OMNIGEN_2 = "omnigen_2"
-    # Video - Wan 2.x
-    WAN_T2V = "wan_t2v"
-    WAN_I2V = "wan_i2v"
-    WAN_VACE = "wan_vace"
-    WAN_T2V_HIGH = "wan_t2v_high"  # Wan 2.2 high noise
-    WAN_T2V_LOW = "wan_t2v_low"   # Wan 2.2 low noise
-    WAN_I2V_HIGH = "wan_i2v_high"  # Wan 2.2 I2V high noise
-    WAN_I2V_LOW = "wan_i2v_low"   # Wan 2.2 I2V low noise
-    HUNYUAN_VIDEO = "hunyuan_video"
-    # Kandinsky
-    KANDINSKY_3 = "kandinsky_3"
-    KANDINSKY_5 = "kandinsky_5"
-    KANDINSKY_5_VIDEO = "kandinsky_5_video"
-
-
-class GenerationMode(str, Enum):
-    TXT2IMG = "txt2img"
-    IMG2IMG = "img2img"
-    INPAINT = "inpaint"
-    EDIT = "edit"
-    VIDEO = "video"
-
-
-class Sampler(str, Enum):
-    EULER = "euler"
-    EULER_A = "euler_a"
-    DPM_2M = "dpm_2m"
-    DPM_2M_KARRAS = "dpm_2m_karras"
-    DPM_SDE = "dpm_sde"
-    DPM_SDE_KARRAS = "dpm_sde_karras"
-    DDIM = "ddim"
-    UNIPC = "unipc"
-    LCM = "lcm"
-    FLOW_MATCH = "flow_match"
-    HEUN = "heun"
-    LMS = "lms"
-    PNDM = "pndm"
-
-
 ASPECT_RATIOS = {
     "1:1": (1, 1),
     "4:3": (4, 3),
@@ -139,139 +79,6 @@ RESOLUTION_PRESETS = {
 }
 
 
-# ============================================================================
-# Request/Response Models
-# ============================================================================
-
-class LoadModelRequest(BaseModel):
-    model_path: str
-    model_type: ModelType
-    vae_path: Optional[str] = None
-    precision: str = "bf16"
-    device: str = "cuda"
-
-
-class LoRAConfig(BaseModel):
-    path: str
-    weight: float = 1.0
-    enabled: bool = True
-    is_lycoris: bool = False  # Auto-detected from file or manually set
-
-
-class GenerateRequest(BaseModel):
-    # Basic
-    prompt: str
-    negative_prompt: str = ""
-    mode: GenerationMode = GenerationMode.TXT2IMG
-
-    # Dimensions
-    width: int = 1024
-    height: int = 1024
-
-    # Generation params
-    steps: int = 30
-    cfg_scale: float = 7.0
-    sampler: Sampler = Sampler.EULER
-    seed: int = -1
-
-    # Batch
-    batch_size: int = 1
-    batch_count: int = 1
-
-    # img2img / inpaint
-    init_image: Optional[str] = None  # base64 or path
-    mask_image: Optional[str] = None  # base64 or path
-    strength: float = 0.75
-
-    # Edit mode
-    edit_instruction: Optional[str] = None
-
-    # Video
-    num_frames: int = 16
-    fps: int = 8
-
-    # LoRAs
-    loras: List[LoRAConfig] = []
-
-    # Advanced
-    clip_skip: int = 1
-    vae_tiling: bool = False
-    free_u: bool = False
-
-    # Forge-classic features
-    rescale_cfg: float = 0.0  # 0 = disabled, 0.7 recommended for v-pred
-    mahiro_cfg: bool = False  # Alternative CFG for better prompt adherence
-    epsilon_scaling: float = 0.0  # Epsilon scaling factor (0 = disabled)
-    skip_early_cond: float = 0.0  # Skip uncond for first N% of steps (0-1)
-    use_flash_attention: bool = True
-    use_sage_attention: bool = False
-
-    # Hires.fix
-    enable_hires: bool = False
-    hires_scale: float = 2.0
-    hires_steps: int = 20
-    hires_denoising: float = 0.5
-    hires_upscaler: str = "latent"  # latent, esrgan, real-esrgan, lanczos
-
-    # Upscaler (standalone)
-    upscale_enabled: bool = False
-    upscaler_model: str = "RealESRGAN_x4plus"
-    upscale_factor: float = 2.0
-
-    # ControlNet
-    controlnet_enabled: bool = False
-    controlnet_model: Optional[str] = None
-    controlnet_image: Optional[str] = None
-    controlnet_strength: float = 1.0
-    controlnet_start: float = 0.0
-    controlnet_end: float = 1.0
-
-    # Model selection (for auto-loading)
-    model_path: Optional[str] = None
-    model_type: Optional[ModelType] = None
-    precision: str = "bf16"
-    vae_path: Optional[str] = None
-
-
-class GeneratedImage(BaseModel):
-    id: str
-    path: str
-    thumbnail: str  # base64
-    prompt: str
-    negative_prompt: str
-    width: int
-    height: int
-    steps: int
-    cfg_scale: float
-    sampler: str
-    seed: int
-    model: str
-    created_at: str
-    generation_time: float
-
-
-class ModelInfo(BaseModel):
-    loaded: bool
-    model_path: Optional[str] = None
-    model_type: Optional[str] = None
-    vae_path: Optional[str] = None
-    precision: Optional[str] = None
-    loras: List[LoRAConfig] = []
-
-
-class SystemStatus(BaseModel):
-    gpu_name: str
-    gpu_memory_total: int
-    gpu_memory_used: int
-    gpu_memory_free: int
-    gpu_utilization: Optional[int] = None
-    model_info: ModelInfo
-    is_generating: bool
-    progress: int
-    current_step: int
-    total_steps: int
-
-
 # ============================================================================
 # Inference Engine
 # ============================================================================
@@ -299,8 +106,11 @@ class InferenceEngine:
         self.output_dir = Path(__file__).parent.parent / "outputs"
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Gallery
+        # Gallery (newest first). Serialized copies are kept alongside so the
+        # polled gallery endpoints don't re-dump every record per request.
         self.gallery: List[GeneratedImage] = []
+        self._gallery_dicts: List[Dict[str, Any]] = []
+        self._gallery_index: Dict[str, GeneratedImage] = {}
 
         # WebSocket connections
         self.websockets: set = set()
@@ -2086,7 +1896,7 @@ class InferenceEngine:
             generation_time=gen_time,
         )
 
-        self.gallery.insert(0, record)
+        self._add_to_gallery(record)
         return record
 
     def _save_video(self, frames, request: GenerateRequest, seed: int, gen_time: float) -> GeneratedImage:
@@ -2120,7 +1930,7 @@ class InferenceEngine:
             generation_time=gen_time,
         )
 
-        self.gallery.insert(0, record)
+        self._add_to_gallery(record)
         return record
 
     def _save_kandinsky_video(self, video_path: str, request: GenerateRequest, seed: int, gen_time: float) -> GeneratedImage:
@@ -2144,9 +1954,38 @@ class InferenceEngine:
             generation_time=gen_time,
         )
 
+        self._add_to_gallery(record)
+        return record
+
+    def _add_to_gallery(self, record: GeneratedImage):
+        """Add a record to the front of the gallery."""
         self.gallery.insert(0, record)
+        self._gallery_dicts.insert(0, record.model_dump())
+        self._gallery_index[record.id] = record
+
+    def get_gallery_item(self, image_id: str) -> Optional[GeneratedImage]:
+        """Look up a gallery record by id."""
+        return self._gallery_index.get(image_id)
+
+    def remove_from_gallery(self, image_id: str) -> Optional[GeneratedImage]:
+        """Remove and return the gallery record with the given id, if present."""
+        record = self._gallery_index.pop(image_id, None)
+        if record is not None:
+            index = self.gallery.index(record)
+            del self.gallery[index]
+            del self._gallery_dicts[index]
         return record
 
+    def clear_gallery(self):
+        """Remove all records from the gallery."""
+        self.gallery.clear()
+        self._gallery_dicts.clear()
+        self._gallery_index.clear()
+
+    def get_gallery_dicts(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get serialized gallery records, newest first."""
+        return self._gallery_dicts[:limit]
+
     def cancel(self):
         """Cancel current generation."""
         self.should_cancel = True
@@ -2275,30 +2114,29 @@ async def cancel_generation():
 @app.get("/api/gallery")
 async def get_gallery(limit: int = 50):
     """Get generated images gallery."""
-    return {"images": engine.gallery[:limit]}
+    return JSONResponse({"images": engine.get_gallery_dicts(limit)})
 
 
 @app.get("/api/gallery/{image_id}")
 async def get_image(image_id: str):
     """Get a specific image."""
-    for img in engine.gallery:
-        if img.id == image_id:
-            return FileResponse(img.path)
-    raise HTTPException(status_code=404, detail="Image not found")
+    img = engine.get_gallery_item(image_id)
+    if img is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(img.path)
 
 
 @app.delete("/api/gallery/{image_id}")
 async def delete_image(image_id: str):
     """Delete an image."""
-    for i, img in enumerate(engine.gallery):
-        if img.id == image_id:
-            try:
-                Path(img.path).unlink(missing_ok=True)
-            except:
-                pass
-            engine.gallery.pop(i)
-            return {"success": True}
-    raise HTTPException(status_code=404, detail="Image not found")
+    img = engine.remove_from_gallery(image_id)
+    if img is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    try:
+        Path(img.path).unlink(missing_ok=True)
+    except:
+        pass
+    return {"success": True}
 
 
 @app.delete("/api/gallery")
@@ -2309,7 +2147,7 @@ async def clear_gallery():
             Path(img.path).unlink(missing_ok=True)
         except:
             pass
-    engine.gallery.clear()
+    engine.clear_gallery()
     return {"success": True}
 
 
@@ -2512,7 +2350,7 @@ async def get_resolutions():
 
 from video_editor_ffmpeg import (
     get_video_editor, Project, Track, Clip, Effect, MediaFile,
-    ClipType, EffectType, TransitionType
+    ClipType, EffectType, TransitionType, parse_frame_rate
 )
 
 class NewProjectRequest(BaseModel):
@@ -2782,6 +2620,16 @@ async def editor_import_media(file_path: str):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@app.post("/api/editor/import/batch")
+async def editor_import_media_batch(file_paths: List[str]):
+    """Import several media files, probing them concurrently."""
+    editor = get_video_editor()
+    try:
+        media = await editor.import_media_many(file_paths)
+        return {"success": True, "media": [media_to_dict(m) for m in media]}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 @app.post("/api/editor/upload")
 async def editor_upload_media(file: UploadFile = File(...)):
     """Upload a media file for editing."""
@@ -2814,7 +2662,7 @@ async def editor_upload_media(file: UploadFile = File(...)):
                     if stream.get("codec_type") == "video":
                         metadata["width"] = stream.get("width")
                         metadata["height"] = stream.get("height")
-                        metadata["fps"] = eval(stream.get("r_frame_rate", "30/1"))
+                        metadata["fps"] = parse_frame_rate(stream.get("r_frame_rate", "30/1"))
                     elif stream.get("codec_type") == "audio":
                         metadata["sample_rate"] = stream.get("sample_rate")
                         metadata["channels"] = stream.get("channels")
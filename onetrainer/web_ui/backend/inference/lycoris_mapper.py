@@ -5,8 +5,11 @@ Maps LyCORIS weight key names between OneTrainer and diffusers conventions.
 Handles the conversion of module names from OneTrainer's format to diffusers' format.
 """
 
+import itertools
 import re
-from typing import Dict, Any, Tuple, Optional
+import weakref
+from collections import Counter
+from typing import Callable, Dict, Any, Iterable, Tuple, Optional
 from pathlib import Path
 
 
@@ -53,62 +56,93 @@ SD3_MAPPINGS = {
     "ff_": "ff.",
 }
 
+# Architecture detection patterns, in priority order
+_ARCHITECTURE_PATTERNS = (
+    # FLUX
+    ("flux", re.compile("lycoris_layers_|adaLN_modulation|feed_forward_w")),
+    # SD3/SD3.5
+    ("sd3", re.compile("lycoris_transformer_|transformer_blocks_")),
+    # SDXL/SD1.5 UNet
+    ("sdxl", re.compile("lora_unet_|unet_")),
+)
+
+# Patterns used to collapse block indices when summarizing key layouts
+_NUMBERED_SEGMENT_RE = re.compile(r'_\d+')
+_NUMBERED_PATH_RE = re.compile(r'\.\d+\.')
+
+# LyCORIS algorithm markers found in weight key names. "boft" must come before
+# "oft" so the longer token wins when both match at the same position.
+_LYCORIS_TYPE_RE = re.compile(r'lokr|loha|lora_down|lora_up|boft|oft|ia3|glora', re.IGNORECASE)
+_LYCORIS_TYPE_LABELS = {"lora_down": "lora", "lora_up": "lora"}
+
+# Per-model cache of simplified module name -> full module name. Weakly keyed
+# so a swapped-out base model doesn't stay alive just because it was mapped once.
+_MODULE_NAME_CACHE: "weakref.WeakKeyDictionary[Any, Dict[str, str]]" = weakref.WeakKeyDictionary()
+
+
+def get_target_module_names(base_model) -> Dict[str, str]:
+    """Get the simplified -> full module name mapping for a model, cached per model."""
+    cached = _MODULE_NAME_CACHE.get(base_model)
+    if cached is not None:
+        return cached
+
+    # Store simplified name -> full name mapping
+    target_modules = {
+        name.replace(".", "_"): name
+        for name, _ in base_model.named_modules()
+    }
+    _MODULE_NAME_CACHE[base_model] = target_modules
+    return target_modules
+
+
+def detect_architecture_from_keys(keys: Iterable[str]) -> str:
+    """Detect the model architecture from a sequence of weight key names."""
+    # Check first 20 keys. Earlier entries in _ARCHITECTURE_PATTERNS take
+    # priority, so only stop early once the top-ranked pattern has matched.
+    best = len(_ARCHITECTURE_PATTERNS)
+    for key in itertools.islice(keys, 20):
+        for rank in range(best):
+            if _ARCHITECTURE_PATTERNS[rank][1].search(key):
+                best = rank
+                break
+        if best == 0:
+            break
+
+    if best < len(_ARCHITECTURE_PATTERNS):
+        return _ARCHITECTURE_PATTERNS[best][0]
+    return "unknown"
+
 
 def detect_architecture(state_dict: Dict[str, Any]) -> str:
     """Detect the model architecture from state dict keys."""
-    keys = list(state_dict.keys())
-    first_keys = keys[:20]  # Check first 20 keys
-
-    # FLUX detection
-    flux_patterns = ["lycoris_layers_", "adaLN_modulation", "feed_forward_w"]
-    if any(any(p in k for p in flux_patterns) for k in first_keys):
-        return "flux"
+    return detect_architecture_from_keys(state_dict.keys())
 
-    # SD3/SD3.5 detection
-    sd3_patterns = ["lycoris_transformer_", "transformer_blocks_"]
-    if any(any(p in k for p in sd3_patterns) for k in first_keys):
-        return "sd3"
 
-    # SDXL/SD1.5 UNet detection
-    unet_patterns = ["lora_unet_", "unet_"]
-    if any(any(p in k for p in unet_patterns) for k in first_keys):
-        return "sdxl"
+def resolve_architecture(state_dict: Dict[str, Any], architecture: str = "auto") -> str:
+    """
+    Resolve the architecture used to map a whole state dict.
 
-    return "unknown"
+    Explicit flux/sdxl/sd3 values are kept; anything else is detected from the
+    keys, falling back to the SDXL UNet naming when nothing matches.
+    """
+    if architecture in _MAPPERS:
+        return architecture
+    detected = detect_architecture(state_dict)
+    return detected if detected in _MAPPERS else "sdxl"
 
 
-def map_onetrainer_to_diffusers(key: str, architecture: str = "auto") -> str:
+def map_onetrainer_to_diffusers(key: str, architecture: str) -> str:
     """
     Map a OneTrainer LyCORIS key to diffusers format.
 
     Args:
         key: The original key from OneTrainer LyCORIS
-        architecture: Target architecture (flux, sdxl, sd3, auto)
+        architecture: Target architecture (flux, sdxl, sd3), see resolve_architecture
 
     Returns:
         The mapped key for diffusers
     """
-    # Select mapping based on architecture
-    if architecture == "flux":
-        mappings = FLUX_MAPPINGS
-    elif architecture == "sdxl":
-        mappings = SDXL_MAPPINGS
-    elif architecture == "sd3":
-        mappings = SD3_MAPPINGS
-    else:
-        # Try to auto-detect from key
-        if "lycoris_layers_" in key:
-            mappings = FLUX_MAPPINGS
-        elif "lycoris_transformer_" in key:
-            mappings = SD3_MAPPINGS
-        else:
-            mappings = SDXL_MAPPINGS
-
-    result = key
-    for old, new in mappings.items():
-        result = result.replace(old, new)
-
-    return result
+    return _MAPPERS[architecture](key)
 
 
 def convert_lycoris_state_dict(
@@ -127,8 +161,8 @@ def convert_lycoris_state_dict(
     Returns:
         Tuple of (converted_state_dict, key_mapping)
     """
-    if architecture == "auto":
-        architecture = detect_architecture(state_dict)
+    if architecture not in _MAPPERS:
+        architecture = resolve_architecture(state_dict, architecture)
         print(f"Detected architecture: {architecture}")
 
     converted = {}
@@ -187,16 +221,12 @@ def create_lycoris_with_mapping(
     state_dict = load_file(lycoris_path, device="cpu")
 
     # Detect architecture
-    if architecture == "auto":
-        architecture = detect_architecture(state_dict)
+    if architecture not in _MAPPERS:
+        architecture = resolve_architecture(state_dict, architecture)
         print(f"Detected architecture: {architecture}")
 
-    # Get target module names from base model
-    target_modules = {}
-    for name, module in base_model.named_modules():
-        # Store simplified name -> full name mapping
-        simple_name = name.replace(".", "_")
-        target_modules[simple_name] = name
+    # Get target module names from base model (cached across loads)
+    target_modules = get_target_module_names(base_model)
 
     # Convert state dict
     converted_dict, key_mapping = convert_lycoris_state_dict(
@@ -248,58 +278,58 @@ def get_model_module_names(model) -> Dict[str, str]:
 
 def analyze_lycoris_file(lycoris_path: str) -> Dict[str, Any]:
     """Analyze a LyCORIS file and return information about its structure."""
-    from safetensors.torch import load_file
+    from safetensors import safe_open
 
-    state_dict = load_file(lycoris_path, device="cpu")
+    # Only the header is needed to inspect key names, so skip loading tensors
+    with safe_open(lycoris_path, framework="pt", device="cpu") as f:
+        keys = list(f.keys())
 
     # Detect architecture
-    architecture = detect_architecture(state_dict)
-
-    # Analyze key patterns
-    key_patterns = {}
-    for key in state_dict.keys():
-        # Extract the base pattern (remove numbers and specific names)
-        pattern = re.sub(r'_\d+', '_N', key)
-        pattern = re.sub(r'\.\d+\.', '.N.', pattern)
-        if pattern not in key_patterns:
-            key_patterns[pattern] = 0
-        key_patterns[pattern] += 1
+    architecture = detect_architecture_from_keys(keys)
+
+    # Analyze key patterns (extract the base pattern by removing numbers)
+    key_patterns = Counter(
+        _NUMBERED_PATH_RE.sub('.N.', _NUMBERED_SEGMENT_RE.sub('_N', key))
+        for key in keys
+    )
 
     # Detect LyCORIS type from keys
     lycoris_type = "unknown"
-    for key in state_dict.keys():
-        if "lokr" in key.lower():
-            lycoris_type = "lokr"
-            break
-        elif "loha" in key.lower():
-            lycoris_type = "loha"
-            break
-        elif "lora_down" in key.lower() or "lora_up" in key.lower():
-            lycoris_type = "lora"
-            break
-        elif "oft" in key.lower():
-            lycoris_type = "oft"
-            break
-        elif "boft" in key.lower():
-            lycoris_type = "boft"
-            break
-        elif "ia3" in key.lower():
-            lycoris_type = "ia3"
-            break
-        elif "glora" in key.lower():
-            lycoris_type = "glora"
+    for key in keys:
+        match = _LYCORIS_TYPE_RE.search(key)
+        if match:
+            token = match.group(0).lower()
+            lycoris_type = _LYCORIS_TYPE_LABELS.get(token, token)
             break
 
     return {
         "path": lycoris_path,
         "architecture": architecture,
         "lycoris_type": lycoris_type,
-        "num_keys": len(state_dict),
+        "num_keys": len(keys),
         "key_patterns": key_patterns,
-        "sample_keys": list(state_dict.keys())[:10]
+        "sample_keys": keys[:10]
     }
 
 
+def _build_mapper(mappings: Dict[str, str]) -> Callable[[str], str]:
+    """Compile a name mapping table into a single-pass key rewriter."""
+    # Identity entries never change a key, and longer names go first so they
+    # win over shorter ones starting at the same position
+    table = {old: new for old, new in mappings.items() if old != new}
+    pattern = re.compile("|".join(re.escape(old) for old in sorted(table, key=len, reverse=True)))
+    replace = lambda m, _table=table: _table[m.group(0)]
+    return lambda key, _sub=pattern.sub: _sub(replace, key)
+
+
+# Key rewriters per architecture, built once at import
+_MAPPERS: Dict[str, Callable[[str], str]] = {
+    "flux": _build_mapper(FLUX_MAPPINGS),
+    "sdxl": _build_mapper(SDXL_MAPPINGS),
+    "sd3": _build_mapper(SD3_MAPPINGS),
+}
+
+
 if __name__ == "__main__":
     import sys
 
@@ -0,0 +1,220 @@
+"""
+Enums and Pydantic request/response models for the inference API.
+
+Kept free of torch and the engine so the API router can import them
+without loading the inference stack.
+"""
+
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+# ============================================================================
+# Configuration & Types
+# ============================================================================
+
+class ModelType(str, Enum):
+    # FLUX
+    FLUX_DEV = "flux_dev"
+    FLUX_SCHNELL = "flux_schnell"
+    FLUX_2_DEV = "flux_2_dev"
+    FLUX_FILL = "flux_fill"
+    # Stable Diffusion
+    SD_15 = "sd_15"
+    SD_21 = "sd_21"
+    SDXL = "sdxl"
+    SDXL_TURBO = "sdxl_turbo"
+    SD_3 = "sd_3"
+    SD_35 = "sd_35"
+    SD_35_TURBO = "sd_35_turbo"
+    # Other
+    PIXART_ALPHA = "pixart_alpha"
+    PIXART_SIGMA = "pixart_sigma"
+    SANA = "sana"
+    CHROMA = "chroma"
+    HIDREAM = "hidream"
+    # Z-Image (Alibaba)
+    Z_IMAGE = "z_image"
+    Z_IMAGE_TURBO = "z_image_turbo"
+    Z_IMAGE_EDIT = "z_image_edit"
+    # Qwen
+    QWEN_IMAGE = "qwen_image"
+    QWEN_IMAGE_EDIT = "qwen_image_edit"
+    # Lumina
+    LUMINA = "lumina"
+    LUMINA_2 = "lumina_2"
+    # OmniGen
+    OMNIGEN = "omnigen"
+    OMNIGEN_2 = "omnigen_2"
+    # Video - Wan 2.x
+    WAN_T2V = "wan_t2v"
+    WAN_I2V = "wan_i2v"
+    WAN_VACE = "wan_vace"
+    WAN_T2V_HIGH = "wan_t2v_high"  # Wan 2.2 high noise
+    WAN_T2V_LOW = "wan_t2v_low"   # Wan 2.2 low noise
+    WAN_I2V_HIGH = "wan_i2v_high"  # Wan 2.2 I2V high noise
+    WAN_I2V_LOW = "wan_i2v_low"   # Wan 2.2 I2V low noise
+    HUNYUAN_VIDEO = "hunyuan_video"
+    # Kandinsky
+    KANDINSKY_3 = "kandinsky_3"
+    KANDINSKY_5 = "kandinsky_5"
+    KANDINSKY_5_VIDEO = "kandinsky_5_video"
+
+
+class GenerationMode(str, Enum):
+    TXT2IMG = "txt2img"
+    IMG2IMG = "img2img"
+    INPAINT = "inpaint"
+    EDIT = "edit"
+    VIDEO = "video"
+
+
+class Sampler(str, Enum):
+    EULER = "euler"
+    EULER_A = "euler_a"
+    DPM_2M = "dpm_2m"
+    DPM_2M_KARRAS = "dpm_2m_karras"
+    DPM_SDE = "dpm_sde"
+    DPM_SDE_KARRAS = "dpm_sde_karras"
+    DDIM = "ddim"
+    UNIPC = "unipc"
+    LCM = "lcm"
+    FLOW_MATCH = "flow_match"
+    HEUN = "heun"
+    LMS = "lms"
+    PNDM = "pndm"
+
+
+# ============================================================================
+# Request/Response Models
+# ============================================================================
+
+class LoadModelRequest(BaseModel):
+    model_path: str
+    model_type: ModelType
+    vae_path: Optional[str] = None
+    precision: str = "bf16"
+    device: str = "cuda"
+
+
+class LoRAConfig(BaseModel):
+    path: str
+    weight: float = 1.0
+    enabled: bool = True
+    is_lycoris: bool = False  # Auto-detected from file or manually set
+
+
+class GenerateRequest(BaseModel):
+    # Basic
+    prompt: str
+    negative_prompt: str = ""
+    mode: GenerationMode = GenerationMode.TXT2IMG
+
+    # Dimensions
+    width: int = 1024
+    height: int = 1024
+
+    # Generation params
+    steps: int = 30
+    cfg_scale: float = 7.0
+    sampler: Sampler = Sampler.EULER
+    seed: int = -1
+
+    # Batch
+    batch_size: int = 1
+    batch_count: int = 1
+
+    # img2img / inpaint
+    init_image: Optional[str] = None  # base64 or path
+    mask_image: Optional[str] = None  # base64 or path
+    strength: float = 0.75
+
+    # Edit mode
+    edit_instruction: Optional[str] = None
+
+    # Video
+    num_frames: int = 16
+    fps: int = 8
+
+    # LoRAs
+    loras: List[LoRAConfig] = []
+
+    # Advanced
+    clip_skip: int = 1
+    vae_tiling: bool = False
+    free_u: bool = False
+
+    # Forge-classic features
+    rescale_cfg: float = 0.0  # 0 = disabled, 0.7 recommended for v-pred
+    mahiro_cfg: bool = False  # Alternative CFG for better prompt adherence
+    epsilon_scaling: float = 0.0  # Epsilon scaling factor (0 = disabled)
+    skip_early_cond: float = 0.0  # Skip uncond for first N% of steps (0-1)
+    use_flash_attention: bool = True
+    use_sage_attention: bool = False
+
+    # Hires.fix
+    enable_hires: bool = False
+    hires_scale: float = 2.0
+    hires_steps: int = 20
+    hires_denoising: float = 0.5
+    hires_upscaler: str = "latent"  # latent, esrgan, real-esrgan, lanczos
+
+    # Upscaler (standalone)
+    upscale_enabled: bool = False
+    upscaler_model: str = "RealESRGAN_x4plus"
+    upscale_factor: float = 2.0
+
+    # ControlNet
+    controlnet_enabled: bool = False
+    controlnet_model: Optional[str] = None
+    controlnet_image: Optional[str] = None
+    controlnet_strength: float = 1.0
+    controlnet_start: float = 0.0
+    controlnet_end: float = 1.0
+
+    # Model selection (for auto-loading)
+    model_path: Optional[str] = None
+    model_type: Optional[ModelType] = None
+    precision: str = "bf16"
+    vae_path: Optional[str] = None
+
+
+class GeneratedImage(BaseModel):
+    id: str
+    path: str
+    thumbnail: str  # base64
+    prompt: str
+    negative_prompt: str
+    width: int
+    height: int
+    steps: int
+    cfg_scale: float
+    sampler: str
+    seed: int
+    model: str
+    created_at: str
+    generation_time: float
+
+
+class ModelInfo(BaseModel):
+    loaded: bool
+    model_path: Optional[str] = None
+    model_type: Optional[str] = None
+    vae_path: Optional[str] = None
+    precision: Optional[str] = None
+    loras: List[LoRAConfig] = []
+
+
+class SystemStatus(BaseModel):
+    gpu_name: str
+    gpu_memory_total: int
+    gpu_memory_used: int
+    gpu_memory_free: int
+    gpu_utilization: Optional[int] = None
+    model_info: ModelInfo
+    is_generating: bool
+    progress: int
+    current_step: int
+    total_steps: int
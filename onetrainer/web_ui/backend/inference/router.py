@@ -5,10 +5,22 @@ Exposes inference endpoints at /api/inference/* for the new InferenceView.
 """
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
+from functools import lru_cache
 from typing import Optional
 import json
 
+try:
+    import torch
+    _CUDA_AVAILABLE = torch.cuda.is_available()
+except ImportError:
+    torch = None
+    _CUDA_AVAILABLE = False
+
+# Request models live apart from the engine, so FastAPI can validate bodies
+# without importing torch and the engine at router import time
+from .models import GenerateRequest, LoadModelRequest
+
 router = APIRouter()
 
 # Lazy-load the engine to avoid startup time
@@ -22,21 +34,28 @@ def get_engine():
     return _engine
 
 
+@lru_cache(maxsize=1)
+def _gpu_static_info():
+    """GPU name and total memory (MB). These never change for the process lifetime."""
+    if not _CUDA_AVAILABLE:
+        return "CPU", 0
+    return (
+        torch.cuda.get_device_name(0),
+        torch.cuda.get_device_properties(0).total_memory // (1024 * 1024),
+    )
+
+
 @router.get("/status")
 async def get_status():
     """Get current inference status."""
     engine = get_engine()
     
-    # Get GPU info
-    import torch
-    if torch.cuda.is_available():
-        gpu_name = torch.cuda.get_device_name(0)
-        gpu_memory_total = torch.cuda.get_device_properties(0).total_memory // (1024 * 1024)
+    # Get GPU info (only memory usage needs to be queried per request)
+    gpu_name, gpu_memory_total = _gpu_static_info()
+    if _CUDA_AVAILABLE:
         gpu_memory_used = torch.cuda.memory_allocated(0) // (1024 * 1024)
         gpu_memory_free = gpu_memory_total - gpu_memory_used
     else:
-        gpu_name = "CPU"
-        gpu_memory_total = 0
         gpu_memory_used = 0
         gpu_memory_free = 0
     
@@ -63,38 +82,28 @@ async def get_status():
 async def get_gallery(limit: int = 50):
     """Get generated images gallery."""
     engine = get_engine()
-    images = engine.gallery[:limit] if hasattr(engine, 'gallery') else []
-    return {"images": [img.model_dump() if hasattr(img, 'model_dump') else img for img in images]}
+    # Records are serialized once when added to the gallery, so hand them
+    # straight to the response without another model_dump/encoder pass
+    return JSONResponse({"images": engine.get_gallery_dicts(limit)})
 
 
 @router.get("/gallery/{image_id}")
 async def get_gallery_image(image_id: str):
     """Get a specific gallery image."""
     engine = get_engine()
-    for img in engine.gallery:
-        if (hasattr(img, 'id') and img.id == image_id) or (isinstance(img, dict) and img.get('id') == image_id):
-            path = img.path if hasattr(img, 'path') else img.get('path')
-            if path:
-                return FileResponse(path)
-    raise HTTPException(status_code=404, detail="Image not found")
+    img = engine.get_gallery_item(image_id)
+    if img is None or not img.path:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(img.path)
 
 
 @router.post("/generate")
-async def generate(request: dict):
+async def generate(request: GenerateRequest):
     """Generate images."""
     engine = get_engine()
-    
-    # Import the request model
-    from .engine import GenerateRequest, GenerationMode
-    
+
     try:
-        # Convert mode string to enum if needed
-        if 'mode' in request and isinstance(request['mode'], str):
-            request['mode'] = GenerationMode(request['mode'])
-        
-        gen_request = GenerateRequest(**request)
-        result = await engine.generate_async(gen_request)
-        return result
+        return await engine.generate_async(request)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -110,19 +119,12 @@ async def cancel_generation():
 
 
 @router.post("/model/load")
-async def load_model(request: dict):
+async def load_model(request: LoadModelRequest):
     """Load a model."""
     engine = get_engine()
-    from .engine import LoadModelRequest, ModelType
-    
+
     try:
-        # Convert model_type string to enum
-        if 'model_type' in request and isinstance(request['model_type'], str):
-            request['model_type'] = ModelType(request['model_type'])
-        
-        load_request = LoadModelRequest(**request)
-        result = engine.load_model(load_request)
-        return result
+        return engine.load_model(request)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -0,0 +1,156 @@
+"""
+Tests for FFmpeg export command building.
+
+Run with: pytest web_ui/backend/inference/test_video_editor_ffmpeg.py
+"""
+
+import io
+import json
+import os
+
+import pytest
+
+from . import video_editor_ffmpeg
+from .video_editor_ffmpeg import Clip, ClipType, Project, VideoEditorEngine
+
+
+class FakeProcess:
+    """Stand-in for an ffmpeg Popen that exits immediately."""
+
+    def __init__(self, cmd, **kwargs):
+        self.cmd = cmd
+        self.stderr = io.BufferedReader(io.BytesIO(b""))
+        self.returncode = 0
+
+    def wait(self):
+        return self.returncode
+
+    def kill(self):
+        pass
+
+
+@pytest.fixture
+def editor(tmp_path, monkeypatch):
+    """Engine working in tmp_path, with software encoding and a single worker."""
+    monkeypatch.chdir(tmp_path)
+    editor = VideoEditorEngine()
+    editor.hardware_encoding = False
+    editor.export_workers = 1
+    editor.project = Project()
+    return editor
+
+
+def make_clips(editor, count):
+    clips = []
+    for i in range(count):
+        clip = Clip(type=ClipType.VIDEO, source_path=f"clip_{i}.mp4",
+                    start_time=float(i), source_out=1.0)
+        editor.project.add_clip(clip)
+        clips.append(clip)
+    return clips
+
+
+def test_small_graph_stays_on_command_line(editor):
+    clips = make_clips(editor, 3)
+
+    cmd = editor._build_export_command(clips, "out.mp4", "mp4", "high")
+
+    assert "-filter_complex" in cmd
+    assert "-filter_complex_script" not in cmd
+    assert editor._export_temp_paths == []
+
+
+def test_many_clips_use_filter_script_single_pass(editor, monkeypatch):
+    """With one export worker, long timelines take the single-pass graph."""
+    clips = make_clips(editor, video_editor_ffmpeg.FILTER_SCRIPT_MIN_CLIPS + 1)
+    launched = []
+
+    def popen(cmd, **kwargs):
+        process = FakeProcess(cmd, **kwargs)
+        launched.append(process)
+        script_path = cmd[cmd.index("-filter_complex_script") + 1]
+        with open(script_path) as f:
+            assert f"concat=n={len(clips)}" in f.read()
+        return process
+
+    monkeypatch.setattr(video_editor_ffmpeg.subprocess, "Popen", popen)
+
+    assert editor.export_video("out.mp4")
+    assert len(launched) == 1
+    script_path = launched[0].cmd[launched[0].cmd.index("-filter_complex_script") + 1]
+    # The script is removed once the export finishes
+    assert not os.path.exists(script_path)
+
+
+def test_segment_command_uses_filter_script_for_large_chain(editor, monkeypatch):
+    clip = make_clips(editor, 1)[0]
+    monkeypatch.setattr(video_editor_ffmpeg, "FILTER_SCRIPT_MIN_BYTES", 10)
+
+    cmd = editor._build_segment_command(clip, "segment.mp4", "mp4", "high")
+
+    assert "-filter_complex" not in cmd
+    script_path = cmd[cmd.index("-filter_complex_script") + 1]
+    assert script_path in editor._export_temp_paths
+    with open(script_path) as f:
+        assert f.read().startswith("[0:v]")
+
+
+def test_hardware_encoder_exports_single_pass(editor, monkeypatch):
+    """Parallel segments would open one GPU encode session per worker."""
+    clips = make_clips(editor, 3)
+    editor.export_workers = 4
+    editor.hardware_encoding = True
+    editor._available_encoders = ["h264_nvenc"]
+    launched = []
+
+    def popen(cmd, **kwargs):
+        launched.append(cmd)
+        return FakeProcess(cmd, **kwargs)
+
+    monkeypatch.setattr(video_editor_ffmpeg.subprocess, "Popen", popen)
+
+    assert editor.export_video("out.mp4")
+    assert len(launched) == 1
+    cmd = launched[0]
+    assert cmd[cmd.index("-c:v") + 1] == "h264_nvenc"
+    assert f"concat=n={len(clips)}" in cmd[cmd.index("-filter_complex") + 1]
+
+
+def test_software_encoder_exports_segments(editor):
+    editor.export_workers = 4
+    assert editor._segment_workers("mp4") == 4
+    editor.hardware_encoding = True
+    editor._available_encoders = ["h264_nvenc"]
+    assert editor._segment_workers("mp4") == 1
+    assert editor._segment_workers("webm") == 4
+
+
+def test_single_probe_defers_cache_write(editor, tmp_path, monkeypatch):
+    """Single imports mark the cache dirty; the file is written on flush."""
+    media = tmp_path / "a.mp4"
+    media.write_bytes(b"a")
+    monkeypatch.setattr(video_editor_ffmpeg, "run_ffprobe", lambda path: {"format": {}})
+    editor.probe_cache_save_delay = 60
+
+    editor._probe(str(media))
+
+    assert not editor._probe_cache_path.exists()
+    editor.flush_probe_cache()
+    assert str(media) in json.loads(editor._probe_cache_path.read_text())
+    assert editor._probe_save_timer is None
+
+
+def test_probe_cache_prunes_missing_files_on_load(editor, tmp_path, monkeypatch):
+    kept = tmp_path / "kept.mp4"
+    gone = tmp_path / "gone.mp4"
+    kept.write_bytes(b"k")
+    gone.write_bytes(b"g")
+    monkeypatch.setattr(video_editor_ffmpeg, "run_ffprobe", lambda path: {"format": {}})
+    editor._probe(str(kept), False)
+    editor._probe(str(gone), False)
+    editor.flush_probe_cache()
+    gone.unlink()
+
+    reloaded = VideoEditorEngine()
+
+    assert list(reloaded._probe_cache) == [str(kept)]
@@ -3,19 +3,38 @@ Video Editor Backend - Pro Timeline Editor using Movis
 Supports multi-track editing, effects, transitions, keyframes
 """
 
+import bisect
+import io
+import itertools
 import json
+import os
+import subprocess
 import uuid
 import tempfile
 import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import movis as mv
 from movis.layer import Composition, Video, Audio, Image, Text, Rectangle
-from movis.effect import GaussianBlur, DropShadow, HSLShift
+from movis.effect import GaussianBlur, DropShadow
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
 
 
 # ============================================================================
@@ -65,7 +84,21 @@ class EffectType(str, Enum):
 # Data Classes
 # ============================================================================
 
-@dataclass
+# Cheap process-local ids for timeline objects. The session tag keeps ids from
+# a previously saved project from colliding with ones created after reloading.
+_ID_SESSION = uuid.uuid4().hex[:8]
+_ID_COUNTERS = defaultdict(lambda: itertools.count(1))
+_ID_LOCK = threading.Lock()
+
+
+def _make_id(prefix: str) -> str:
+    """Generate a compact prefixed id, e.g. clip_1a2b3c4d_12."""
+    with _ID_LOCK:
+        n = next(_ID_COUNTERS[prefix])
+    return f"{prefix}_{_ID_SESSION}_{n}"
+
+
+@dataclass(slots=True)
 class Keyframe:
     """Animation keyframe."""
     time: float  # in seconds
@@ -73,20 +106,99 @@ class Keyframe:
     easing: str = "linear"  # linear, ease_in, ease_out, ease_in_out
 
 
-@dataclass
+# Per-pixel effects Movis has no built-in for. The loop versions are compiled
+# with numba when available (one fused pass per frame); otherwise the NumPy
+# versions below are used.
+
+def _chromakey_loops(img, key_r, key_g, key_b, limit):
+    """Zero alpha where the L1 RGB distance to the key colour is below limit."""
+    out = img.copy()
+    h, w = img.shape[0], img.shape[1]
+    for y in prange(h):
+        for x in range(w):
+            d = (abs(np.int32(img[y, x, 0]) - key_r) + abs(np.int32(img[y, x, 1]) - key_g)
+                 + abs(np.int32(img[y, x, 2]) - key_b))
+            if d < limit:
+                out[y, x, 3] = 0
+    return out
+
+
+def _brightness_contrast_loops(img, gain, bias):
+    """out = clip(gain * (rgb - 128) + 128 + bias), alpha untouched."""
+    out = img.copy()
+    h, w = img.shape[0], img.shape[1]
+    for y in prange(h):
+        for x in range(w):
+            for c in range(3):
+                v = gain * (np.float32(img[y, x, c]) - 128.0) + 128.0 + bias
+                out[y, x, c] = np.uint8(min(max(v, 0.0), 255.0))
+    return out
+
+
+def _chromakey_numpy(img, key_r, key_g, key_b, limit):
+    rgb = img[..., :3].astype(np.int32)
+    dist = np.abs(rgb - np.array([key_r, key_g, key_b], dtype=np.int32)).sum(axis=2)
+    out = img.copy()
+    out[..., 3][dist < limit] = 0
+    return out
+
+
+def _brightness_contrast_numpy(img, gain, bias):
+    out = img.copy()
+    rgb = gain * (img[..., :3].astype(np.float32) - 128.0) + 128.0 + bias
+    out[..., :3] = np.clip(rgb, 0.0, 255.0).astype(np.uint8)
+    return out
+
+
+if njit is not None:
+    _chromakey = njit(cache=True, parallel=True, fastmath=True)(_chromakey_loops)
+    _brightness_contrast = njit(cache=True, parallel=True, fastmath=True)(_brightness_contrast_loops)
+else:
+    _chromakey = _chromakey_numpy
+    _brightness_contrast = _brightness_contrast_numpy
+
+
+class ChromaKeyEffect:
+    """Movis effect keying out pixels close to a colour (RGBA frames)."""
+
+    def __init__(self, color: str = "#00FF00", threshold: float = 0.3):
+        self.key = parse_hex_color(color)
+        # threshold is relative to the largest possible L1 RGB distance
+        self.limit = int(threshold * 3 * 255)
+
+    def __call__(self, prev_image: np.ndarray, time: float) -> np.ndarray:
+        if prev_image.ndim != 3 or prev_image.shape[2] != 4:
+            return prev_image
+        return _chromakey(prev_image, *self.key, self.limit)
+
+
+class BrightnessContrastEffect:
+    """Movis effect applying brightness (-1..1) and contrast gain in one pass."""
+
+    def __init__(self, brightness: float = 0.0, contrast: float = 1.0):
+        self.gain = np.float32(contrast)
+        self.bias = np.float32(brightness * 255.0)
+
+    def __call__(self, prev_image: np.ndarray, time: float) -> np.ndarray:
+        if prev_image.ndim != 3 or prev_image.shape[2] < 3:
+            return prev_image
+        return _brightness_contrast(prev_image, self.gain, self.bias)
+
+
+@dataclass(slots=True)
 class Effect:
     """Effect applied to a clip."""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=lambda: _make_id("fx"))
     type: EffectType = EffectType.OPACITY
     enabled: bool = True
     params: Dict[str, Any] = field(default_factory=dict)
     keyframes: Dict[str, List[Keyframe]] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class Clip:
     """A clip on the timeline."""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=lambda: _make_id("clip"))
     type: ClipType = ClipType.VIDEO
     name: str = ""
 
@@ -130,11 +242,14 @@ class Clip:
     # Animation keyframes
     keyframes: Dict[str, List[Keyframe]] = field(default_factory=dict)
 
+    # Bumped on every edit; lets serialized dicts be reused while unchanged
+    version: int = 0
+
 
-@dataclass
+@dataclass(slots=True)
 class Track:
     """A track in the timeline."""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=lambda: _make_id("track"))
     name: str = ""
     type: TrackType = TrackType.VIDEO
     order: int = 0
@@ -144,7 +259,7 @@ class Track:
     height: int = 60  # UI height in pixels
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     """Video editing project."""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -165,15 +280,331 @@ class Project:
     created_at: str = ""
     modified_at: str = ""
 
+    # Id lookups kept in sync with tracks/clips by the add/remove helpers
+    _track_by_id: Dict[str, Track] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _clip_by_id: Dict[str, Clip] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Clips per track id, each list kept sorted by start_time
+    _clips_by_track: Dict[str, List[Clip]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Tracks in composition order (highest order, i.e. bottom layer, first)
+    _render_tracks: List[Track] = field(default_factory=list, init=False, repr=False, compare=False)
+
     def __post_init__(self):
-        if not self.tracks:
+        if self.tracks:
+            self._track_by_id = {t.id: t for t in self.tracks}
+            self._render_tracks = sorted(self.tracks, key=lambda t: t.order, reverse=True)
+        else:
             # Create default tracks
-            self.tracks = [
-                Track(name="Video 1", type=TrackType.VIDEO, order=0),
-                Track(name="Video 2", type=TrackType.VIDEO, order=1),
-                Track(name="Audio 1", type=TrackType.AUDIO, order=2),
-                Track(name="Audio 2", type=TrackType.AUDIO, order=3),
-            ]
+            self.add_track(Track(name="Video 1", type=TrackType.VIDEO, order=0))
+            self.add_track(Track(name="Video 2", type=TrackType.VIDEO, order=1))
+            self.add_track(Track(name="Audio 1", type=TrackType.AUDIO, order=2))
+            self.add_track(Track(name="Audio 2", type=TrackType.AUDIO, order=3))
+        self._reindex_clips()
+
+    def _reindex_clips(self):
+        """Rebuild the clip lookups from the clip list."""
+        self._clip_by_id = {c.id: c for c in self.clips}
+        self._clips_by_track = {}
+        for clip in sorted(self.clips, key=lambda c: c.start_time):
+            self._clips_by_track.setdefault(clip.track_id, []).append(clip)
+
+    def _insert_track_clip(self, clip: Clip):
+        """Insert a clip into its track's start-time ordered list."""
+        bisect.insort(self._clips_by_track.setdefault(clip.track_id, []), clip,
+                      key=lambda c: c.start_time)
+
+    def _remove_track_clip(self, clip: Clip, track_id: str):
+        """Remove a clip from the ordered list of the given track."""
+        track_clips = self._clips_by_track.get(track_id)
+        if track_clips:
+            for i, c in enumerate(track_clips):
+                if c is clip:
+                    del track_clips[i]
+                    break
+
+    def get_track(self, track_id: str) -> Optional[Track]:
+        """Look up a track by id."""
+        return self._track_by_id.get(track_id)
+
+    def add_track(self, track: Track) -> Track:
+        """Append a track to the project."""
+        self.tracks.append(track)
+        self._track_by_id[track.id] = track
+        bisect.insort(self._render_tracks, track, key=lambda t: -t.order)
+        return track
+
+    def remove_track(self, track_id: str) -> Optional[Track]:
+        """Remove a track and all clips placed on it."""
+        track = self._track_by_id.pop(track_id, None)
+        if track is None:
+            return None
+        self.tracks.remove(track)
+        self._render_tracks.remove(track)
+        removed = self._clips_by_track.pop(track_id, [])
+        if removed:
+            self.clips = [c for c in self.clips if c.track_id != track_id]
+            for clip in removed:
+                self._clip_by_id.pop(clip.id, None)
+        return track
+
+    def sort_tracks(self):
+        """Re-sort tracks after their order values changed."""
+        self.tracks.sort(key=lambda t: t.order)
+        self._render_tracks = sorted(self.tracks, key=lambda t: t.order, reverse=True)
+
+    def get_render_tracks(self) -> List[Track]:
+        """Tracks in composition order: highest order (bottom layer) first."""
+        return self._render_tracks
+
+    def get_clip(self, clip_id: str) -> Optional[Clip]:
+        """Look up a clip by id."""
+        return self._clip_by_id.get(clip_id)
+
+    def get_track_clips(self, track_id: str) -> List[Clip]:
+        """Clips on a track, sorted by start time."""
+        return self._clips_by_track.get(track_id, [])
+
+    def add_clip(self, clip: Clip) -> Clip:
+        """Append a clip to the project."""
+        self.clips.append(clip)
+        self._clip_by_id[clip.id] = clip
+        self._insert_track_clip(clip)
+        return clip
+
+    def remove_clip(self, clip_id: str) -> Optional[Clip]:
+        """Remove a clip by id."""
+        clip = self._clip_by_id.pop(clip_id, None)
+        if clip is not None:
+            self.clips.remove(clip)
+            self._remove_track_clip(clip, clip.track_id)
+        return clip
+
+    def move_clip(self, clip: Clip, old_track_id: str):
+        """Re-sort a clip after its track_id or start_time changed."""
+        self._remove_track_clip(clip, old_track_id)
+        self._insert_track_clip(clip)
+
+
+_TRACK_FIELDS = tuple(f.name for f in fields(Track))
+_CLIP_FIELDS = tuple(f.name for f in fields(Clip))
+# Clip fields that can be updated on an existing Movis layer without a rebuild
+_LIVE_CLIP_FIELDS = frozenset({'name', 'position', 'scale', 'rotation', 'opacity'})
+
+
+@lru_cache(maxsize=256)
+def parse_hex_color(color: str) -> Tuple[int, int, int]:
+    """Parse hex color to RGB tuple. Cached since projects reuse a handful of colors."""
+    rgb = bytes.fromhex(color.lstrip('#')[:6])
+    return rgb[0], rgb[1], rgb[2]
+
+
+def _parse_frame_rate(rate: str, default: float = 30.0) -> float:
+    """Parse an ffprobe rational frame rate such as "30000/1001" without eval()."""
+    num, _, den = rate.partition("/")
+    try:
+        num_f, den_f = float(num), float(den or 1)
+    except ValueError:
+        return default
+    return num_f / den_f if den_f else default
+
+
+@lru_cache(maxsize=512)
+def _probe_media_cached(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Run ffprobe once per file version and keep the fields the editor uses.
+
+    mtime/size are part of the cache key so a rewritten file is probed again.
+    """
+    result = subprocess.run([
+        'ffprobe', '-v', 'quiet', '-print_format', 'json',
+        '-show_format', '-show_streams', path
+    ], capture_output=True, text=True)
+    info = json.loads(result.stdout)
+
+    streams = info.get('streams', [])
+    duration = info.get('format', {}).get('duration')
+    video_stream = next((s for s in streams if s['codec_type'] == 'video'), None)
+    if video_stream is not None:
+        return {
+            'type': 'video',
+            'duration': duration,
+            'width': int(video_stream.get('width', 0)),
+            'height': int(video_stream.get('height', 0)),
+            'fps': _parse_frame_rate(video_stream.get('r_frame_rate', '30/1')),
+        }
+    if any(s['codec_type'] == 'audio' for s in streams):
+        return {'type': 'audio', 'duration': duration}
+    return {'type': 'image', 'duration': duration}
+
+
+def probe_media(path: str) -> Dict[str, Any]:
+    """Get cached media info for a file (type, duration and video size/fps)."""
+    st = os.stat(path)
+    return _probe_media_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
+def _json_merge_diff(old: Dict, new: Dict) -> Dict:
+    """Build an RFC 7396 merge patch that turns old into new.
+
+    Nested objects are diffed recursively, anything else (lists included) is
+    replaced whole. As in the RFC, null means "remove", so a key whose new
+    value is null is dropped on apply.
+    """
+    patch = {key: None for key in old if key not in new}
+    for key, value in new.items():
+        prev = old.get(key, _MISSING)
+        if prev == value:
+            continue
+        if isinstance(prev, dict) and isinstance(value, dict):
+            patch[key] = _json_merge_diff(prev, value)
+        else:
+            patch[key] = value
+    return patch
+
+
+def _json_merge_apply(target: Any, patch: Any) -> Any:
+    """Apply an RFC 7396 merge patch, returning a new object."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = _json_merge_apply(result.get(key), value)
+    return result
+
+
+_MISSING = object()
+
+
+def _index_project_dict(data: Dict) -> Dict:
+    """Key tracks/clips by id so merge patches touch single entries."""
+    return {
+        **data,
+        'tracks': {t['id']: t for t in data.get('tracks', [])},
+        'clips': {c['id']: c for c in data.get('clips', [])},
+    }
+
+
+def _unindex_project_dict(data: Dict) -> Dict:
+    return {
+        **data,
+        'tracks': list(data.get('tracks', {}).values()),
+        'clips': list(data.get('clips', {}).values()),
+    }
+
+
+class PreviewFrameCache:
+    """Two-tier LRU cache of rendered preview frames, bounded by total bytes.
+
+    The most recent hot_frames frames stay decoded; older ones are demoted to
+    compressed bytes (JPEG for opaque frames, PNG when alpha matters) and
+    decoded again on access. Keys are (frame_num, width, height) so
+    differently sized previews of the same frame don't overwrite each other.
+    Safe to share with the prefetch workers.
+    """
+
+    def __init__(self, budget_bytes: int, hot_frames: int = 16, jpeg_quality: int = 85):
+        self.budget_bytes = budget_bytes
+        self.hot_frames = hot_frames
+        self.jpeg_quality = jpeg_quality
+        self.total_bytes = 0
+        self._hot: "OrderedDict[Tuple[int, Optional[int], Optional[int]], np.ndarray]" = OrderedDict()
+        # key -> (encoded bytes, original shape)
+        self._cold: "OrderedDict[Tuple[int, Optional[int], Optional[int]], Tuple[bytes, Tuple[int, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hot) + len(self._cold)
+
+    def __contains__(self, key) -> bool:
+        return key in self._hot or key in self._cold
+
+    def get(self, key: Tuple[int, Optional[int], Optional[int]]) -> Optional[np.ndarray]:
+        with self._lock:
+            frame = self._hot.get(key)
+            if frame is not None:
+                self._hot.move_to_end(key)
+                return frame
+            entry = self._cold.pop(key, None)
+            if entry is None:
+                return None
+            self.total_bytes -= len(entry[0])
+            frame = self._decode(*entry)
+            self._insert_hot(key, frame)
+            return frame
+
+    def put(self, key: Tuple[int, Optional[int], Optional[int]], frame: np.ndarray):
+        with self._lock:
+            self._discard(key)
+            if frame.nbytes > self.budget_bytes:
+                return
+            self._insert_hot(key, frame)
+
+    def evict(self):
+        """Drop least recently used frames until the cache fits its budget."""
+        with self._lock:
+            self._evict()
+
+    def invalidate_frames(self, first: int, last: int):
+        """Drop cached frames numbered first..last (inclusive)."""
+        with self._lock:
+            stale = [key for key in itertools.chain(self._hot, self._cold) if first <= key[0] <= last]
+            for key in stale:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._hot.clear()
+            self._cold.clear()
+            self.total_bytes = 0
+
+    def _insert_hot(self, key, frame: np.ndarray):
+        self._hot[key] = frame
+        self.total_bytes += frame.nbytes
+        while len(self._hot) > self.hot_frames:
+            old_key, old = self._hot.popitem(last=False)
+            self.total_bytes -= old.nbytes
+            data = self._encode(old)
+            self._cold[old_key] = (data, old.shape)
+            self.total_bytes += len(data)
+        self._evict()
+
+    def _discard(self, key):
+        frame = self._hot.pop(key, None)
+        if frame is not None:
+            self.total_bytes -= frame.nbytes
+        entry = self._cold.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= len(entry[0])
+
+    def _evict(self):
+        # Cold frames are cheaper to lose than the ones being scrubbed
+        while self.total_bytes > self.budget_bytes and self._cold:
+            data, _ = self._cold.popitem(last=False)[1]
+            self.total_bytes -= len(data)
+        while self.total_bytes > self.budget_bytes and self._hot:
+            _, frame = self._hot.popitem(last=False)
+            self.total_bytes -= frame.nbytes
+
+    def _encode(self, frame: np.ndarray) -> bytes:
+        from PIL import Image as PILImage
+        buf = io.BytesIO()
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            if frame[..., 3].min() < 255:
+                PILImage.fromarray(frame).save(buf, format="PNG", compress_level=1)
+                return buf.getvalue()
+            frame = frame[..., :3]
+        PILImage.fromarray(frame).save(buf, format="JPEG", quality=self.jpeg_quality)
+        return buf.getvalue()
+
+    def _decode(self, data: bytes, shape: Tuple[int, ...]) -> np.ndarray:
+        from PIL import Image as PILImage
+        frame = np.array(PILImage.open(io.BytesIO(data)))
+        if frame.shape != shape:
+            # Opaque RGBA frame stored as JPEG: restore the alpha channel
+            alpha = np.full(shape[:2] + (1,), 255, dtype=frame.dtype)
+            frame = np.concatenate([frame, alpha], axis=2)
+        return frame
 
 
 # ============================================================================
@@ -186,13 +617,55 @@ class VideoEditorEngine:
     def __init__(self):
         self.project: Optional[Project] = None
         self.composition: Optional[Composition] = None
-        self.preview_cache: Dict[int, np.ndarray] = {}
+        self.preview_cache = PreviewFrameCache(512 * 1024 * 1024)
+        # clip id -> Movis layer item, so single-clip edits skip a full rebuild
+        self._layer_items: Dict[str, Any] = {}
+        # One Movis Video layer per source file, shared by every clip cut from
+        # it, with the number of live layer items using each
+        self._video_sources: Dict[str, Video] = {}
+        self._video_source_refs: Dict[str, int] = defaultdict(int)
+        # clip id -> (clip, version, serialized dict)
+        self._clip_dict_cache: Dict[str, Tuple[Clip, int, Dict]] = {}
+        # Composition renders, rebuilds/in-place layer edits and project
+        # mutations are serialized, so neither a prefetch worker nor the
+        # debounced rebuild timer sees a half-updated composition or project
+        self._render_lock = threading.RLock()
+        self._preview_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preview")
+        self._pending_frames: Dict[Tuple[int, Optional[int], Optional[int]], Future] = {}
+        self._pending_lock = threading.Lock()
+        self.prefetch_frames = 8
+        # Bumped (under _render_lock) whenever cached previews are invalidated,
+        # so a frame resized outside the lock is not cached once stale
+        self._preview_generation = 0
+        # Structural edits schedule a rebuild rebuild_delay seconds out, so a
+        # burst of edits (e.g. dragging a clip) is coalesced into one rebuild
+        # covering the union of their dirty ranges
+        self.rebuild_delay = 0.016
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_timer: Optional[threading.Timer] = None
+        self._pending_rebuild: Optional[Tuple[float, float]] = None
+        self._rebuild_scheduled = False
         self.is_rendering = False
         self.render_progress = 0.0
         self.projects_dir = Path("/home/alex/OneTrainer/inference_app/projects")
         self.projects_dir.mkdir(exist_ok=True)
         self.exports_dir = Path("/home/alex/OneTrainer/inference_app/exports")
         self.exports_dir.mkdir(exist_ok=True)
+        # Saves after the first append merge patches to <path>.patches.jsonl;
+        # the snapshot is rewritten once this many patches have piled up
+        self.patch_compact_every = 50
+        self._last_saved: Optional[Tuple[str, Dict]] = None
+        self._patch_count = 0
+
+    @property
+    def cache_budget_bytes(self) -> int:
+        """Memory budget for cached preview frames."""
+        return self.preview_cache.budget_bytes
+
+    @cache_budget_bytes.setter
+    def cache_budget_bytes(self, value: int):
+        self.preview_cache.budget_bytes = value
+        self.preview_cache.evict()
 
     def new_project(self, name: str = "Untitled", width: int = 1920,
                     height: int = 1080, fps: float = 30.0) -> Project:
@@ -200,44 +673,97 @@ class VideoEditorEngine:
         from datetime import datetime
         now = datetime.now().isoformat()
 
-        self.project = Project(
-            name=name,
-            width=width,
-            height=height,
-            fps=fps,
-            created_at=now,
-            modified_at=now,
-        )
-        self._rebuild_composition()
-        return self.project
+        with self._render_lock:
+            self.project = Project(
+                name=name,
+                width=width,
+                height=height,
+                fps=fps,
+                created_at=now,
+                modified_at=now,
+            )
+            self._last_saved = None
+            self._clip_dict_cache.clear()
+            self._rebuild_composition()
+            return self.project
+
+    def save_project(self, path: str = None, compact: bool = False) -> str:
+        """Save project to file.
 
-    def save_project(self, path: str = None) -> str:
-        """Save project to file."""
+        The first save (or compact=True) writes a full snapshot; later saves to
+        the same path only append the changes since the previous save.
+        """
         if not self.project:
             raise ValueError("No project loaded")
 
         if path is None:
             path = str(self.projects_dir / f"{self.project.id}.json")
+        patches_path = f"{path}.patches.jsonl"
 
         # Convert to dict for JSON serialization
-        data = self._project_to_dict(self.project)
-
-        with open(path, 'w') as f:
-            json.dump(data, f, indent=2)
-
+        if orjson is not None:
+            raw = orjson.dumps(self._project_to_dict(self.project, native=True),
+                               option=orjson.OPT_INDENT_2)
+            current = _index_project_dict(orjson.loads(raw))
+        else:
+            raw = json.dumps(self._project_to_dict(self.project), indent=2).encode()
+            current = _index_project_dict(json.loads(raw))
+
+        if (not compact and self._last_saved is not None
+                and self._last_saved[0] == path
+                and self._patch_count < self.patch_compact_every
+                and os.path.exists(path)):
+            patch = _json_merge_diff(self._last_saved[1], current)
+            if patch:
+                line = orjson.dumps(patch) if orjson is not None else json.dumps(patch).encode()
+                with open(patches_path, 'ab') as f:
+                    f.write(line + b'\n')
+                self._patch_count += 1
+        else:
+            with open(path, 'wb') as f:
+                f.write(raw)
+            if os.path.exists(patches_path):
+                os.remove(patches_path)
+            self._patch_count = 0
+
+        self._last_saved = (path, current)
         return path
 
     def load_project(self, path: str) -> Project:
-        """Load project from file."""
-        with open(path, 'r') as f:
-            data = json.load(f)
-
-        self.project = self._dict_to_project(data)
-        self._rebuild_composition()
-        return self.project
-
-    def _project_to_dict(self, project: Project) -> Dict:
-        """Convert project to serializable dict."""
+        """Load project from file, replaying any saved patches."""
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(path, 'rb') as f:
+            data = _index_project_dict(loads(f.read()))
+
+        patch_count = 0
+        patches_path = f"{path}.patches.jsonl"
+        if os.path.exists(patches_path):
+            with open(patches_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        data = _json_merge_apply(data, loads(line))
+                        patch_count += 1
+
+        project = self._dict_to_project(_unindex_project_dict(data))
+        with self._render_lock:
+            self.project = project
+            self._last_saved = (path, data)
+            self._patch_count = patch_count
+            self._clip_dict_cache.clear()
+            self._rebuild_composition()
+            return self.project
+
+    def _project_to_dict(self, project: Project, native: bool = False) -> Dict:
+        """Convert project to serializable dict.
+
+        With native=True tracks and clips are left as dataclasses: orjson
+        serializes dataclasses and enums itself, so no per-clip dicts are built.
+        """
+        if native:
+            tracks, clips = list(project.tracks), list(project.clips)
+        else:
+            tracks = [self._track_to_dict(t) for t in project.tracks]
+            clips = [self._clip_to_dict(c) for c in project.clips]
         return {
             'id': project.id,
             'name': project.name,
@@ -246,30 +772,59 @@ class VideoEditorEngine:
             'fps': project.fps,
             'duration': project.duration,
             'background_color': project.background_color,
-            'tracks': [asdict(t) for t in project.tracks],
-            'clips': [self._clip_to_dict(c) for c in project.clips],
+            'tracks': tracks,
+            'clips': clips,
             'created_at': project.created_at,
             'modified_at': project.modified_at,
         }
 
+    # Shallow field copies instead of asdict(), which deep-copies every nested
+    # dataclass and container before the JSON encoder walks them again
+    def _track_to_dict(self, track: Track) -> Dict:
+        """Convert track to serializable dict."""
+        d = {name: getattr(track, name) for name in _TRACK_FIELDS}
+        d['type'] = track.type.value
+        return d
+
     def _clip_to_dict(self, clip: Clip) -> Dict:
-        """Convert clip to serializable dict."""
-        d = asdict(clip)
+        """Convert clip to serializable dict.
+
+        The result is cached until clip.version changes, so callers must not
+        mutate it.
+        """
+        cached = self._clip_dict_cache.get(clip.id)
+        if cached is not None and cached[0] is clip and cached[1] == clip.version:
+            return cached[2]
+
+        d = {name: getattr(clip, name) for name in _CLIP_FIELDS}
         d['type'] = clip.type.value
         d['transition_in'] = clip.transition_in.value
         d['transition_out'] = clip.transition_out.value
         d['effects'] = [self._effect_to_dict(e) for e in clip.effects]
+        d['keyframes'] = self._keyframes_to_dict(clip.keyframes)
+        self._clip_dict_cache[clip.id] = (clip, clip.version, d)
         return d
 
     def _effect_to_dict(self, effect: Effect) -> Dict:
         """Convert effect to serializable dict."""
-        d = asdict(effect)
-        d['type'] = effect.type.value
-        return d
+        return {
+            'id': effect.id,
+            'type': effect.type.value,
+            'enabled': effect.enabled,
+            'params': dict(effect.params),
+            'keyframes': self._keyframes_to_dict(effect.keyframes),
+        }
+
+    def _keyframes_to_dict(self, keyframes: Dict[str, List[Keyframe]]) -> Dict:
+        """Convert keyframes to serializable dict."""
+        return {
+            param: [{'time': k.time, 'value': k.value, 'easing': k.easing} for k in kfs]
+            for param, kfs in keyframes.items()
+        }
 
     def _dict_to_project(self, data: Dict) -> Project:
         """Convert dict to Project."""
-        tracks = [Track(**t) for t in data.get('tracks', [])]
+        tracks = [Track(**{**t, 'type': TrackType(t.get('type', 'video'))}) for t in data.get('tracks', [])]
         clips = [self._dict_to_clip(c) for c in data.get('clips', [])]
 
         return Project(
@@ -288,10 +843,12 @@ class VideoEditorEngine:
 
     def _dict_to_clip(self, data: Dict) -> Clip:
         """Convert dict to Clip."""
+        data = dict(data)
         data['type'] = ClipType(data.get('type', 'video'))
         data['transition_in'] = TransitionType(data.get('transition_in', 'none'))
         data['transition_out'] = TransitionType(data.get('transition_out', 'none'))
         data['effects'] = [self._dict_to_effect(e) for e in data.get('effects', [])]
+        data['keyframes'] = self._dict_to_keyframes(data.get('keyframes', {}))
         data['position'] = tuple(data.get('position', (0, 0)))
         data['scale'] = tuple(data.get('scale', (1, 1)))
         data['anchor'] = tuple(data.get('anchor', (0.5, 0.5)))
@@ -300,9 +857,15 @@ class VideoEditorEngine:
 
     def _dict_to_effect(self, data: Dict) -> Effect:
         """Convert dict to Effect."""
+        data = dict(data)
         data['type'] = EffectType(data.get('type', 'opacity'))
+        data['keyframes'] = self._dict_to_keyframes(data.get('keyframes', {}))
         return Effect(**data)
 
+    def _dict_to_keyframes(self, data: Dict) -> Dict[str, List[Keyframe]]:
+        """Convert serialized keyframes back to Keyframe objects."""
+        return {param: [Keyframe(**k) for k in keyframes] for param, keyframes in data.items()}
+
     # ========================================================================
     # Track Management
     # ========================================================================
@@ -312,19 +875,19 @@ class VideoEditorEngine:
         if not self.project:
             raise ValueError("No project loaded")
 
-        order = max([t.order for t in self.project.tracks], default=-1) + 1
-        track = Track(name=name, type=track_type, order=order)
-        self.project.tracks.append(track)
-        return track
+        with self._render_lock:
+            order = max([t.order for t in self.project.tracks], default=-1) + 1
+            track = Track(name=name, type=track_type, order=order)
+            return self.project.add_track(track)
 
     def remove_track(self, track_id: str) -> bool:
         """Remove a track and its clips."""
         if not self.project:
             return False
 
-        self.project.tracks = [t for t in self.project.tracks if t.id != track_id]
-        self.project.clips = [c for c in self.project.clips if c.track_id != track_id]
-        self._rebuild_composition()
+        with self._render_lock:
+            self.project.remove_track(track_id)
+            self._schedule_rebuild()
         return True
 
     def reorder_tracks(self, track_ids: List[str]) -> bool:
@@ -332,13 +895,14 @@ class VideoEditorEngine:
         if not self.project:
             return False
 
-        track_map = {t.id: t for t in self.project.tracks}
-        for i, tid in enumerate(track_ids):
-            if tid in track_map:
-                track_map[tid].order = i
+        with self._render_lock:
+            for i, tid in enumerate(track_ids):
+                track = self.project.get_track(tid)
+                if track:
+                    track.order = i
 
-        self.project.tracks.sort(key=lambda t: t.order)
-        self._rebuild_composition()
+            self.project.sort_tracks()
+            self._rebuild_composition()
         return True
 
     # ========================================================================
@@ -355,14 +919,15 @@ class VideoEditorEngine:
             clip.duration = self._get_media_duration(clip.source_path)
             clip.source_end = clip.duration
 
-        self.project.clips.append(clip)
+        with self._render_lock:
+            self.project.add_clip(clip)
 
-        # Auto-extend project duration if clip extends beyond
-        clip_end = clip.start_time + clip.duration
-        if clip_end > self.project.duration:
-            self.project.duration = clip_end + 10  # Add 10s buffer
+            # Auto-extend project duration if clip extends beyond
+            clip_end = clip.start_time + clip.duration
+            if clip_end > self.project.duration:
+                self.project.duration = clip_end + 10  # Add 10s buffer
 
-        self._rebuild_composition()
+            self._schedule_rebuild(dirty_range=(clip.start_time, clip_end))
         return clip
 
     def remove_clip(self, clip_id: str) -> bool:
@@ -370,8 +935,11 @@ class VideoEditorEngine:
         if not self.project:
             return False
 
-        self.project.clips = [c for c in self.project.clips if c.id != clip_id]
-        self._rebuild_composition()
+        with self._render_lock:
+            clip = self.project.remove_clip(clip_id)
+            self._clip_dict_cache.pop(clip_id, None)
+            if clip is not None and not self._remove_clip_layer(clip):
+                self._schedule_rebuild(dirty_range=self._clip_range(clip))
         return True
 
     def update_clip(self, clip_id: str, updates: Dict[str, Any]) -> Optional[Clip]:
@@ -379,21 +947,41 @@ class VideoEditorEngine:
         if not self.project:
             return None
 
-        for clip in self.project.clips:
-            if clip.id == clip_id:
-                for key, value in updates.items():
-                    if hasattr(clip, key):
-                        setattr(clip, key, value)
-                self._rebuild_composition()
-                return clip
-        return None
+        clip = self.project.get_clip(clip_id)
+        if not clip:
+            return None
+
+        # Held across the field writes too, so a debounced rebuild on the
+        # timer thread never walks a half-edited clip or track list
+        with self._render_lock:
+            old_track_id, old_start_time = clip.track_id, clip.start_time
+            old_start, old_end = self._clip_range(clip)
+            changed = set()
+            for key, value in updates.items():
+                if key not in ('id', 'version') and hasattr(clip, key):
+                    setattr(clip, key, value)
+                    changed.add(key)
+            clip.version += 1
+            if clip.track_id != old_track_id or clip.start_time != old_start_time:
+                self.project.move_clip(clip, old_track_id)
+
+            layer_item = self._layer_items.get(clip.id)
+            if layer_item is not None and changed <= _LIVE_CLIP_FIELDS:
+                # Transform-only edit: mutate the existing layer in place
+                self._apply_transform(layer_item, clip, force=True)
+                self._invalidate_clip(clip)
+            elif changed:
+                new_start, new_end = self._clip_range(clip)
+                self._schedule_rebuild(
+                    dirty_range=(min(old_start, new_start), max(old_end, new_end)))
+        return clip
 
     def split_clip(self, clip_id: str, split_time: float) -> Tuple[Optional[Clip], Optional[Clip]]:
         """Split a clip at the specified time."""
         if not self.project:
             return None, None
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return None, None
 
@@ -418,24 +1006,21 @@ class VideoEditorEngine:
             opacity=clip.opacity,
         )
 
-        # Update first clip
-        clip.duration = relative_time
-        clip.source_end = clip.source_start + relative_time
-        clip.name = f"{clip.name} (1)"
+        with self._render_lock:
+            # Update first clip
+            clip.duration = relative_time
+            clip.source_end = clip.source_start + relative_time
+            clip.name = f"{clip.name} (1)"
+            clip.version += 1
 
-        self.project.clips.append(clip2)
-        self._rebuild_composition()
+            self.project.add_clip(clip2)
+            self._schedule_rebuild(dirty_range=(clip.start_time, clip2.start_time + clip2.duration))
         return clip, clip2
 
     def _get_media_duration(self, path: str) -> float:
         """Get duration of a media file."""
         try:
-            import subprocess
-            result = subprocess.run([
-                'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1', path
-            ], capture_output=True, text=True)
-            return float(result.stdout.strip())
+            return float(probe_media(path)['duration'])
         except:
             return 5.0  # Default duration
 
@@ -449,7 +1034,7 @@ class VideoEditorEngine:
         if not self.project:
             return None
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return None
 
@@ -457,8 +1042,17 @@ class VideoEditorEngine:
             type=effect_type,
             params=params or self._get_default_effect_params(effect_type)
         )
-        clip.effects.append(effect)
-        self._rebuild_composition()
+        with self._render_lock:
+            clip.effects.append(effect)
+            clip.version += 1
+            layer_item = self._layer_items.get(clip.id)
+            if layer_item is not None:
+                # Effects stack in list order, so appending matches a rebuild
+                if effect.enabled:
+                    self._apply_effect(layer_item, effect)
+                self._invalidate_clip(clip)
+            else:
+                self._schedule_rebuild(dirty_range=self._clip_range(clip))
         return effect
 
     def remove_effect(self, clip_id: str, effect_id: str) -> bool:
@@ -466,12 +1060,14 @@ class VideoEditorEngine:
         if not self.project:
             return False
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return False
 
-        clip.effects = [e for e in clip.effects if e.id != effect_id]
-        self._rebuild_composition()
+        with self._render_lock:
+            clip.effects = [e for e in clip.effects if e.id != effect_id]
+            clip.version += 1
+            self._schedule_rebuild(dirty_range=self._clip_range(clip))
         return True
 
     def _get_default_effect_params(self, effect_type: EffectType) -> Dict[str, Any]:
@@ -494,47 +1090,103 @@ class VideoEditorEngine:
     # Composition Building
     # ========================================================================
 
-    def _rebuild_composition(self):
-        """Rebuild the Movis composition from project data."""
+    def _schedule_rebuild(self, dirty_range: Optional[Tuple[float, float]] = None):
+        """Queue a debounced composition rebuild.
+
+        Edits landing before the timer fires are folded into the same
+        rebuild; a None dirty_range anywhere in the burst means a full clear.
+        """
+        with self._rebuild_lock:
+            if not self._rebuild_scheduled:
+                self._pending_rebuild = dirty_range
+            elif self._pending_rebuild is not None:
+                if dirty_range is None:
+                    self._pending_rebuild = None
+                else:
+                    start, end = self._pending_rebuild
+                    self._pending_rebuild = (min(start, dirty_range[0]), max(end, dirty_range[1]))
+
+            if not self._rebuild_scheduled:
+                self._rebuild_scheduled = True
+                self._rebuild_timer = threading.Timer(self.rebuild_delay, self.flush_rebuild)
+                self._rebuild_timer.daemon = True
+                self._rebuild_timer.start()
+
+    def flush_rebuild(self):
+        """Run a scheduled rebuild now instead of waiting for its timer."""
+        with self._render_lock:
+            with self._rebuild_lock:
+                if not self._rebuild_scheduled:
+                    return
+                dirty_range = self._pending_rebuild
+                self._rebuild_scheduled = False
+                self._pending_rebuild = None
+                if self._rebuild_timer is not None:
+                    self._rebuild_timer.cancel()
+                    self._rebuild_timer = None
+            self._rebuild_composition(dirty_range=dirty_range)
+
+    def _cancel_scheduled_rebuild(self):
+        """Drop a pending debounced rebuild without running it."""
+        with self._rebuild_lock:
+            self._rebuild_scheduled = False
+            self._pending_rebuild = None
+            if self._rebuild_timer is not None:
+                self._rebuild_timer.cancel()
+                self._rebuild_timer = None
+
+    def _rebuild_composition(self, dirty_range: Optional[Tuple[float, float]] = None):
+        """Rebuild the Movis composition from project data.
+
+        dirty_range limits preview cache invalidation to the edited span of
+        the timeline; without it every cached frame is dropped.
+        """
         if not self.project:
             return
 
-        # Clear preview cache
-        self.preview_cache.clear()
-
-        # Create new composition
-        self.composition = Composition(
-            size=(self.project.width, self.project.height),
-            duration=self.project.duration,
-        )
-
-        # Parse background color
-        bg_color = self._parse_color(self.project.background_color)
+        with self._render_lock:
+            if dirty_range is None:
+                # A full rebuild supersedes any scheduled one
+                self._cancel_scheduled_rebuild()
+            # Clear preview cache
+            if dirty_range is None:
+                self.preview_cache.clear()
+                self._preview_generation += 1
+            else:
+                self._invalidate_time_range(*dirty_range)
+            self._layer_items.clear()
+            self._video_source_refs.clear()
 
-        # Add background
-        self.composition.add_layer(
-            Rectangle(
+            # Create new composition
+            self.composition = Composition(
                 size=(self.project.width, self.project.height),
-                color=bg_color,
-            ),
-            name="background",
-        )
-
-        # Sort tracks by order (lower order = higher layer priority)
-        sorted_tracks = sorted(self.project.tracks, key=lambda t: t.order, reverse=True)
+                duration=self.project.duration,
+            )
 
-        for track in sorted_tracks:
-            if track.muted or not track.visible:
-                continue
+            # Parse background color
+            bg_color = self._parse_color(self.project.background_color)
 
-            # Get clips for this track, sorted by start time
-            track_clips = sorted(
-                [c for c in self.project.clips if c.track_id == track.id],
-                key=lambda c: c.start_time
+            # Add background
+            self.composition.add_layer(
+                Rectangle(
+                    size=(self.project.width, self.project.height),
+                    color=bg_color,
+                ),
+                name="background",
             )
 
-            for clip in track_clips:
-                self._add_clip_to_composition(clip)
+            # Tracks come pre-sorted (lower order = higher layer priority)
+            for track in self.project.get_render_tracks():
+                if track.muted or not track.visible:
+                    continue
+
+                # Clips for this track, already sorted by start time
+                for clip in self.project.get_track_clips(track.id):
+                    self._add_clip_to_composition(clip)
+
+            # Close sources no clip uses any more
+            for path in [p for p in self._video_sources if not self._video_source_refs.get(p)]:
+                del self._video_sources[path]
 
     def _add_clip_to_composition(self, clip: Clip):
         """Add a clip to the composition."""
@@ -542,7 +1194,10 @@ class VideoEditorEngine:
 
         try:
             if clip.type == ClipType.VIDEO:
-                layer = Video(clip.source_path)
+                layer = self._video_sources.get(clip.source_path)
+                if layer is None:
+                    layer = Video(clip.source_path)
+                    self._video_sources[clip.source_path] = layer
             elif clip.type == ClipType.AUDIO:
                 layer = Audio(clip.source_path)
             elif clip.type == ClipType.IMAGE:
@@ -564,24 +1219,20 @@ class VideoEditorEngine:
             if layer is None:
                 return
 
-            # Add to composition with timing
+            # Add to composition with timing; layers are named by clip id so
+            # they can be looked up (and popped) without touching the others
             layer_item = self.composition.add_layer(
                 layer,
-                name=clip.name or clip.id,
+                name=clip.id,
                 offset=clip.start_time,
                 start_time=clip.source_start,
                 end_time=clip.source_start + clip.duration,
             )
+            self._layer_items[clip.id] = layer_item
+            if clip.type == ClipType.VIDEO:
+                self._video_source_refs[clip.source_path] += 1
 
-            # Apply transform
-            if clip.position != (0, 0):
-                layer_item.position = clip.position
-            if clip.scale != (1, 1):
-                layer_item.scale = clip.scale
-            if clip.rotation != 0:
-                layer_item.rotation = clip.rotation
-            if clip.opacity != 1.0:
-                layer_item.opacity = clip.opacity
+            self._apply_transform(layer_item, clip)
 
             # Apply effects
             for effect in clip.effects:
@@ -592,6 +1243,57 @@ class VideoEditorEngine:
         except Exception as e:
             print(f"Failed to add clip {clip.id}: {e}")
 
+    def _apply_transform(self, layer_item, clip: Clip, force: bool = False):
+        """Apply clip transform to a layer (defaults are skipped unless forced)."""
+        if force or clip.position != (0, 0):
+            layer_item.position = clip.position
+        if force or clip.scale != (1, 1):
+            layer_item.scale = clip.scale
+        if force or clip.rotation != 0:
+            layer_item.rotation = clip.rotation
+        if force or clip.opacity != 1.0:
+            layer_item.opacity = clip.opacity
+
+    def _remove_clip_layer(self, clip: Clip) -> bool:
+        """Drop a single clip's layer from the composition. Returns False if a
+        full rebuild is needed instead."""
+        if self.composition is None:
+            return False
+        if self._layer_items.pop(clip.id, None) is None:
+            # Clip was never rendered (muted/hidden track or failed layer)
+            self._invalidate_clip(clip)
+            return True
+        with self._render_lock:
+            try:
+                self.composition.pop_layer(clip.id)
+            except (AttributeError, KeyError):
+                return False
+            if clip.type == ClipType.VIDEO:
+                self._release_video_source(clip.source_path)
+            self._invalidate_clip(clip)
+        return True
+
+    def _release_video_source(self, path: str):
+        """Drop a layer's hold on a shared Video source, closing it when unused."""
+        self._video_source_refs[path] -= 1
+        if self._video_source_refs[path] <= 0:
+            del self._video_source_refs[path]
+            self._video_sources.pop(path, None)
+
+    @staticmethod
+    def _clip_range(clip: Clip) -> Tuple[float, float]:
+        return clip.start_time, clip.start_time + clip.duration
+
+    def _invalidate_time_range(self, start: float, end: float):
+        """Drop cached preview frames that overlap [start, end] seconds."""
+        fps = self.project.fps
+        self.preview_cache.invalidate_frames(int(start * fps), int(end * fps) + 1)
+        self._preview_generation += 1
+
+    def _invalidate_clip(self, clip: Clip):
+        """Drop cached state derived from a single clip."""
+        self._invalidate_time_range(*self._clip_range(clip))
+
     def _apply_effect(self, layer_item, effect: Effect):
         """Apply an effect to a layer."""
         try:
@@ -603,48 +1305,83 @@ class VideoEditorEngine:
                 blur = effect.params.get('blur', 10)
                 layer_item.add_effect(DropShadow(offset=offset, radius=blur))
             elif effect.type == EffectType.CHROMAKEY:
-                # Chromakey not available in movis, use HSL shift as alternative
-                hue = effect.params.get('hue_shift', 0)
-                saturation = effect.params.get('saturation', 1.0)
-                lightness = effect.params.get('lightness', 1.0)
-                layer_item.add_effect(HSLShift(h=hue, s=saturation, l=lightness))
+                # Chromakey not available in movis, use our own pixel kernel
+                color = effect.params.get('color', '#00FF00')
+                threshold = effect.params.get('threshold', 0.3)
+                layer_item.add_effect(ChromaKeyEffect(color, threshold))
+            elif effect.type == EffectType.BRIGHTNESS:
+                value = effect.params.get('value', 0.0)
+                layer_item.add_effect(BrightnessContrastEffect(brightness=value))
+            elif effect.type == EffectType.CONTRAST:
+                value = effect.params.get('value', 1.0)
+                layer_item.add_effect(BrightnessContrastEffect(contrast=value))
         except Exception as e:
             print(f"Failed to apply effect {effect.type}: {e}")
 
     def _parse_color(self, color: str) -> Tuple[int, int, int]:
         """Parse hex color to RGB tuple."""
-        if color.startswith('#'):
-            color = color[1:]
-        return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+        return parse_hex_color(color)
 
     # ========================================================================
     # Preview & Rendering
     # ========================================================================
 
     def get_preview_frame(self, time: float, width: int = None,
-                          height: int = None, draft: bool = True) -> Optional[np.ndarray]:
-        """Get a preview frame at the specified time."""
+                          height: int = None, draft: bool = True,
+                          blocking: bool = True) -> Optional[np.ndarray]:
+        """Get a preview frame at the specified time.
+
+        Draft previews also queue the next prefetch_frames frames on the
+        background workers, so scrubbing and playback mostly hit the cache.
+        With blocking=False a cache miss returns None and the frame is
+        rendered in the background instead.
+        """
+        self.flush_rebuild()
         if not self.composition:
             return None
 
         # Use cache if available
         frame_num = int(time * self.project.fps)
-        if frame_num in self.preview_cache:
-            return self.preview_cache[frame_num]
+        cache_key = (frame_num, width, height)
+        self._cancel_stale_previews(frame_num, width, height)
+        frame = self.preview_cache.get(cache_key)
+        if frame is None:
+            if blocking:
+                frame = self._render_preview(time, width, height, cache_key)
+            else:
+                self._submit_preview(time, width, height, cache_key)
 
+        if draft and self.prefetch_frames > 0:
+            self._prefetch_previews(frame_num + 1, width, height)
+        return frame
+
+    def _render_preview(self, time: float, width: Optional[int], height: Optional[int],
+                        cache_key: Tuple[int, Optional[int], Optional[int]]) -> Optional[np.ndarray]:
+        """Render, resize and cache one preview frame."""
         try:
-            # Render frame at current time
-            frame = self.composition(time)
+            with self._render_lock:
+                if self.composition is None:
+                    return None
+
+                # Render frame at current time
+                frame = self.composition(time)
+                generation = self._preview_generation
 
-            # Resize if needed
+            # Resize if needed; done outside the lock so it doesn't hold up
+            # other renders or edits
             if width and height:
                 from PIL import Image as PILImage
                 img = PILImage.fromarray(frame)
-                img = img.resize((width, height), PILImage.Resampling.LANCZOS)
+                # reducing_gap box-reduces large downscales before the
+                # LANCZOS pass, which is much cheaper at near-identical quality
+                img = img.resize((width, height), PILImage.Resampling.LANCZOS,
+                                 reducing_gap=2.0)
                 frame = np.array(img)
 
-            # Cache frame
-            self.preview_cache[frame_num] = frame
+            # Cache frame, unless an edit invalidated previews meanwhile
+            with self._render_lock:
+                if generation == self._preview_generation:
+                    self.preview_cache.put(cache_key, frame)
 
             return frame
 
@@ -652,9 +1389,44 @@ class VideoEditorEngine:
             print(f"Failed to render preview frame: {e}")
             return None
 
+    def _submit_preview(self, time: float, width: Optional[int], height: Optional[int],
+                        cache_key: Tuple[int, Optional[int], Optional[int]]):
+        """Queue a preview frame render unless one is already pending."""
+        with self._pending_lock:
+            if cache_key in self._pending_frames:
+                return
+            future = self._preview_executor.submit(
+                self._render_preview, time, width, height, cache_key)
+            self._pending_frames[cache_key] = future
+        future.add_done_callback(lambda _: self._pending_frames.pop(cache_key, None))
+
+    def _cancel_stale_previews(self, frame_num: int, width: Optional[int], height: Optional[int]):
+        """Drop queued renders outside the prefetch window of the playhead.
+
+        After a seek, renders queued for the old position (or another preview
+        size) would only compete with the frames now wanted; renders already
+        running are left to finish.
+        """
+        last_frame = frame_num + self.prefetch_frames
+        with self._pending_lock:
+            for key, future in list(self._pending_frames.items()):
+                pending_frame, w, h = key
+                if (w, h) != (width, height) or not frame_num <= pending_frame <= last_frame:
+                    future.cancel()
+
+    def _prefetch_previews(self, first_frame: int, width: Optional[int], height: Optional[int]):
+        """Queue renders for the frames following the playhead."""
+        fps = self.project.fps
+        last_frame = min(first_frame + self.prefetch_frames, int(self.project.duration * fps) + 1)
+        for frame_num in range(first_frame, last_frame):
+            cache_key = (frame_num, width, height)
+            if cache_key not in self.preview_cache:
+                self._submit_preview(frame_num / fps, width, height, cache_key)
+
     def export_video(self, output_path: str, start_time: float = 0,
                      end_time: float = None, callback=None) -> bool:
         """Export the project to a video file."""
+        self.flush_rebuild()
         if not self.composition or not self.project:
             return False
 
@@ -713,45 +1485,34 @@ class VideoEditorEngine:
             'fps': self.project.fps,
             'width': self.project.width,
             'height': self.project.height,
-            'tracks': [asdict(t) for t in self.project.tracks],
+            'tracks': [self._track_to_dict(t) for t in self.project.tracks],
             'clips': [self._clip_to_dict(c) for c in self.project.clips],
         }
 
     def import_media(self, file_path: str) -> Dict[str, Any]:
         """Import a media file and return its metadata."""
-        import subprocess
-
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        # Get media info using ffprobe
+        # Get media info using ffprobe (cached per file version)
         try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', '-show_streams', file_path
-            ], capture_output=True, text=True)
-            info = json.loads(result.stdout)
-
-            # Determine media type
-            has_video = any(s['codec_type'] == 'video' for s in info.get('streams', []))
-            has_audio = any(s['codec_type'] == 'audio' for s in info.get('streams', []))
-
-            if has_video:
-                video_stream = next(s for s in info['streams'] if s['codec_type'] == 'video')
+            info = probe_media(file_path)
+
+            if info['type'] == 'video':
                 return {
                     'type': 'video',
                     'path': file_path,
-                    'duration': float(info['format'].get('duration', 0)),
-                    'width': int(video_stream.get('width', 0)),
-                    'height': int(video_stream.get('height', 0)),
-                    'fps': eval(video_stream.get('r_frame_rate', '30/1')),
+                    'duration': float(info['duration'] or 0),
+                    'width': info['width'],
+                    'height': info['height'],
+                    'fps': info['fps'],
                 }
-            elif has_audio:
+            elif info['type'] == 'audio':
                 return {
                     'type': 'audio',
                     'path': file_path,
-                    'duration': float(info['format'].get('duration', 0)),
+                    'duration': float(info['duration'] or 0),
                 }
             else:
                 # Assume image
@@ -4,17 +4,30 @@ Powerful video editing with filter graphs, transitions, and effects
 """
 
 import asyncio
+import atexit
+import bisect
+import io
+import itertools
 import json
 import os
+import re
+import struct
 import subprocess
 import tempfile
+import threading
 import uuid
-from dataclasses import dataclass, field, asdict
+import zlib
+from collections import ChainMap, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import shutil
 
+import numpy as np
+
 
 # ============================================================================
 # Enums
@@ -70,7 +83,7 @@ class EffectType(str, Enum):
 # Data Models
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class MediaFile:
     """Imported media file with metadata."""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -81,6 +94,7 @@ class MediaFile:
     width: int = 0
     height: int = 0
     fps: float = 0.0
+    rotation: int = 0  # display rotation in degrees, applied by ffmpeg on decode
     codec: str = ""
     audio_codec: str = ""
     sample_rate: int = 0
@@ -88,7 +102,7 @@ class MediaFile:
     file_size: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Effect:
     """Effect applied to a clip."""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -97,14 +111,14 @@ class Effect:
     params: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class Transition:
     """Transition between clips."""
     type: TransitionType = TransitionType.NONE
     duration: float = 0.5
 
 
-@dataclass
+@dataclass(slots=True)
 class Clip:
     """A clip on the timeline."""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -146,6 +160,9 @@ class Clip:
     volume: float = 1.0
     muted: bool = False
 
+    # Bumped on every edit so derived data (filter chains) can be cached
+    version: int = 0
+
     @property
     def duration(self) -> float:
         return self.source_out - self.source_in
@@ -155,7 +172,7 @@ class Clip:
         return self.start_time + self.duration
 
 
-@dataclass
+@dataclass(slots=True)
 class Track:
     """A track in the timeline."""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -168,7 +185,7 @@ class Track:
     height: int = 60
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     """Video editing project."""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -186,20 +203,151 @@ class Project:
     tracks: List[Track] = field(default_factory=list)
     clips: List[Clip] = field(default_factory=list)
 
+    # Derived timeline state, reset by invalidate_timeline() whenever clips change
+    _duration: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    # Clips sorted by start time, with their start times for bisecting and
+    # parallel arrays of end time, position in self.clips and visual flag
+    _by_start: Optional[List[Clip]] = field(default=None, init=False, repr=False, compare=False)
+    _starts: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _ends: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _order: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _visual: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _max_clip_duration: float = field(default=0.0, init=False, repr=False, compare=False)
+
+    # id -> object lookups, kept in step by the add/remove methods below
+    _media_by_id: Dict[str, MediaFile] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _track_by_id: Dict[str, Track] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _clip_by_id: Dict[str, Clip] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.reindex()
+
+    def reindex(self):
+        """Rebuild the id lookups after media/tracks/clips were replaced wholesale."""
+        self._media_by_id = {m.id: m for m in self.media}
+        self._track_by_id = {t.id: t for t in self.tracks}
+        self._clip_by_id = {c.id: c for c in self.clips}
+
+    def get_media(self, media_id: str) -> Optional[MediaFile]:
+        """Look up imported media by id."""
+        return self._media_by_id.get(media_id)
+
+    def add_media(self, media: MediaFile) -> MediaFile:
+        """Append imported media to the project."""
+        self.media.append(media)
+        self._media_by_id[media.id] = media
+        return media
+
+    def remove_media(self, media_id: str) -> Optional[MediaFile]:
+        """Remove imported media by id."""
+        media = self._media_by_id.pop(media_id, None)
+        if media is not None:
+            self.media.remove(media)
+        return media
+
+    def get_track(self, track_id: str) -> Optional[Track]:
+        """Look up a track by id."""
+        return self._track_by_id.get(track_id)
+
+    def add_track(self, track: Track) -> Track:
+        """Append a track to the project."""
+        self.tracks.append(track)
+        self._track_by_id[track.id] = track
+        return track
+
+    def remove_track(self, track_id: str) -> List[Clip]:
+        """Remove a track and its clips; returns the removed clips."""
+        track = self._track_by_id.pop(track_id, None)
+        if track is not None:
+            self.tracks.remove(track)
+        removed = [c for c in self.clips if c.track_id == track_id]
+        if removed:
+            self.clips = [c for c in self.clips if c.track_id != track_id]
+            for clip in removed:
+                self._clip_by_id.pop(clip.id, None)
+            self.invalidate_timeline()
+        return removed
+
+    def get_clip(self, clip_id: str) -> Optional[Clip]:
+        """Look up a clip by id."""
+        return self._clip_by_id.get(clip_id)
+
+    def add_clip(self, clip: Clip) -> Clip:
+        """Append a clip to the project."""
+        self.clips.append(clip)
+        self._clip_by_id[clip.id] = clip
+        self.invalidate_timeline()
+        return clip
+
+    def remove_clip(self, clip_id: str) -> Optional[Clip]:
+        """Remove a clip by id."""
+        clip = self._clip_by_id.pop(clip_id, None)
+        if clip is not None:
+            self.clips.remove(clip)
+            self.invalidate_timeline()
+        return clip
+
     @property
     def duration(self) -> float:
         """Calculate project duration from clips."""
-        if not self.clips:
-            return 0.0
-        return max(c.end_time for c in self.clips)
+        if self._duration is None:
+            self._duration = max((c.end_time for c in self.clips), default=0.0)
+        return self._duration
+
+    def invalidate_timeline(self):
+        """Forget cached duration and clip index after clips were added,
+        removed or moved."""
+        self._duration = None
+        self._by_start = None
+
+    def _clip_index(self) -> List[Clip]:
+        if self._by_start is None:
+            order = sorted(range(len(self.clips)), key=lambda i: self.clips[i].start_time)
+            self._by_start = [self.clips[i] for i in order]
+            self._starts = [c.start_time for c in self._by_start]
+            self._ends = np.array([c.end_time for c in self._by_start], dtype=np.float64)
+            self._order = np.array(order, dtype=np.intp)
+            self._visual = np.array([c.type in _VISUAL_CLIP_TYPES for c in self._by_start], dtype=bool)
+            self._max_clip_duration = max((c.duration for c in self.clips), default=0.0)
+        return self._by_start
+
+    def _select(self, lo: int, hi: int, mask: np.ndarray) -> List[Clip]:
+        """Clips at by_start[lo:hi] where mask is set, in project order."""
+        idx = np.flatnonzero(mask) + lo
+        if len(idx) > 1:
+            idx = idx[np.argsort(self._order[idx], kind="stable")]
+        by_start = self._by_start
+        return [by_start[i] for i in idx]
+
+    def clips_overlapping(self, start: float, end: float) -> List[Clip]:
+        """Clips intersecting [start, end), in project order."""
+        self._clip_index()
+        # A clip can only overlap if it starts in [start - longest clip, end)
+        lo = bisect.bisect_left(self._starts, start - self._max_clip_duration)
+        hi = bisect.bisect_left(self._starts, end)
+        return self._select(lo, hi, self._ends[lo:hi] > start)
+
+    def clips_at(self, time: float, visual_only: bool = False) -> List[Clip]:
+        """Clips active at the given time, in project order.
+
+        visual_only keeps just video and image clips.
+        """
+        self._clip_index()
+        lo = bisect.bisect_left(self._starts, time - self._max_clip_duration)
+        hi = bisect.bisect_right(self._starts, time)
+        mask = self._ends[lo:hi] > time
+        if visual_only:
+            mask &= self._visual[lo:hi]
+        return self._select(lo, hi, mask)
 
 
 # ============================================================================
 # FFmpeg Utilities
 # ============================================================================
 
-def run_ffprobe(path: str) -> Dict[str, Any]:
-    """Get media file metadata using ffprobe."""
+@lru_cache(maxsize=512)
+def _run_ffprobe_cached(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """ffprobe keyed by file version; mtime/size invalidate on rewrite."""
     cmd = [
         "ffprobe",
         "-v", "quiet",
@@ -216,6 +364,178 @@ def run_ffprobe(path: str) -> Dict[str, Any]:
     return json.loads(result.stdout)
 
 
+def run_ffprobe(path: str) -> Dict[str, Any]:
+    """Get media file metadata using ffprobe.
+
+    Results are cached per (path, mtime, size) and shared between callers,
+    so treat the returned dict as read-only.
+    """
+    st = os.stat(path)
+    return _run_ffprobe_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=512)
+def _probe_duration_cached(path: str, mtime_ns: int, size: int) -> float:
+    cmd = [
+        "ffprobe",
+        "-v", "quiet",
+        "-show_entries", "format=duration",
+        "-of", "csv=p=0",
+        str(path)
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr}")
+
+    return float(result.stdout.strip())
+
+
+def probe_duration(path: str) -> float:
+    """Get just the container duration, skipping stream parsing."""
+    st = os.stat(path)
+    return _probe_duration_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
+def parse_frame_rate(rate: str, default: float = 30.0) -> float:
+    """Parse an ffprobe rational frame rate such as "30000/1001"."""
+    num, _, den = rate.partition("/")
+    try:
+        num_f, den_f = float(num), float(den or 1)
+    except ValueError:
+        return default
+    return num_f / den_f if den_f else default
+
+
+_TIME_RE = re.compile(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)")
+_TIME_RE_BYTES = re.compile(_TIME_RE.pattern.encode())
+
+
+def _stream_rotation(stream: Dict[str, Any]) -> int:
+    """Display rotation of an ffprobe video stream, from tags or side data."""
+    rotate = stream.get("tags", {}).get("rotate")
+    if rotate is None:
+        for side_data in stream.get("side_data_list", []):
+            if "rotation" in side_data:
+                rotate = side_data["rotation"]
+                break
+    try:
+        return int(float(rotate or 0)) % 360
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_ffmpeg_time(line) -> Optional[float]:
+    """Parse the time= field of an ffmpeg progress line (str or bytes), in seconds."""
+    m = (_TIME_RE_BYTES if isinstance(line, bytes) else _TIME_RE).search(line)
+    if m is None:
+        return None
+    h, mn, sec = m.groups()
+    return int(h) * 3600 + int(mn) * 60 + float(sec)
+
+
+# H.264 encoders in order of preference, hardware first. Each maps
+# export quality -> encoder rate-control args.
+_H264_ENCODERS: Dict[str, Dict[str, List[str]]] = {
+    "h264_nvenc": {
+        "high": ["-preset", "p5", "-rc", "vbr", "-cq", "19", "-b:v", "0"],
+        "medium": ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+        "low": ["-preset", "p2", "-rc", "vbr", "-cq", "28", "-b:v", "0"],
+    },
+    "h264_qsv": {
+        "high": ["-preset", "slow", "-global_quality", "18"],
+        "medium": ["-preset", "medium", "-global_quality", "23"],
+        "low": ["-preset", "fast", "-global_quality", "28"],
+    },
+    "h264_videotoolbox": {
+        "high": ["-q:v", "65"],
+        "medium": ["-q:v", "55"],
+        "low": ["-q:v", "45"],
+    },
+    "libx264": {
+        "high": ["-crf", "18", "-preset", "slow"],
+        "medium": ["-crf", "23", "-preset", "medium"],
+        "low": ["-crf", "28", "-preset", "fast"],
+    },
+}
+
+# Encoders that cannot take yuv420p directly
+_ENCODER_PIX_FMTS = {"h264_qsv": "nv12"}
+
+
+def _encoder_works(encoder: str) -> bool:
+    """Encode one tiny frame; an encoder can be compiled in with no device."""
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+        "-frames:v", "1", "-pix_fmt", _ENCODER_PIX_FMTS.get(encoder, "yuv420p"),
+        "-c:v", encoder,
+        "-f", "null", "-"
+    ]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=15).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def probe_hardware_encoders(cache_path: Optional[Path] = None) -> List[str]:
+    """Hardware H.264 encoders that this ffmpeg build can actually use.
+
+    The result is stored in cache_path and reused until the ffmpeg binary
+    changes.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return []
+    stamp = os.stat(ffmpeg).st_mtime_ns
+
+    if cache_path is not None:
+        try:
+            cached = json.loads(cache_path.read_text())
+            if cached.get("ffmpeg") == ffmpeg and cached.get("mtime_ns") == stamp:
+                return cached["encoders"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    try:
+        listing = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"],
+                                 capture_output=True, text=True, timeout=15).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    listed = {line.split()[1] for line in listing.splitlines() if len(line.split()) > 1}
+    encoders = [e for e in _H264_ENCODERS
+                if e != "libx264" and e in listed and _encoder_works(e)]
+
+    if cache_path is not None:
+        try:
+            cache_path.write_text(json.dumps(
+                {"ffmpeg": ffmpeg, "mtime_ns": stamp, "encoders": encoders}))
+        except OSError:
+            pass
+    return encoders
+
+
+_LINE_SPLIT_RE = re.compile(rb"\r\n|\r|\n")
+
+
+def iter_stderr_lines(stream, chunk_size: int = 65536):
+    """Yield raw lines from an ffmpeg stderr pipe.
+
+    ffmpeg ends progress updates with a bare carriage return, so lines are
+    split on CR and LF directly from large reads, with no text decoding.
+    """
+    leftover = b""
+    while True:
+        chunk = stream.read1(chunk_size)
+        if not chunk:
+            break
+        lines = _LINE_SPLIT_RE.split(leftover + chunk)
+        leftover = lines.pop()
+        yield from lines
+    if leftover:
+        yield leftover
+
+
 def extract_frame(input_path: str, time: float, output_path: str,
                   width: int = 640, height: int = 360) -> bool:
     """Extract a single frame from video."""
@@ -224,7 +544,7 @@ def extract_frame(input_path: str, time: float, output_path: str,
         "-ss", str(time),
         "-i", input_path,
         "-vframes", "1",
-        "-vf", f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+        "-vf", _fit_filter(width, height),
         "-f", "image2",
         output_path
     ]
@@ -233,126 +553,294 @@ def extract_frame(input_path: str, time: float, output_path: str,
     return result.returncode == 0
 
 
+def solid_png(width: int, height: int, rgb: Tuple[int, int, int] = (0, 0, 0)) -> bytes:
+    """Encode a single-colour RGB PNG without spawning ffmpeg."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    # Each scanline is a filter byte (0 = none) followed by the pixels
+    row = b"\x00" + bytes(rgb) * width
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(row * height, 9))
+            + chunk(b"IEND", b""))
+
+
+def read_frame_rgb(input_path: str, time: float,
+                   width: int = 640, height: int = 360) -> Optional[np.ndarray]:
+    """Decode a single frame as an RGB array, piped straight from ffmpeg.
+
+    Raw rgb24 is read into a preallocated buffer, so no intermediate image
+    file or bytes object is created.
+    """
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-ss", str(time),
+        "-i", input_path,
+        "-vframes", "1",
+        "-vf", _fit_filter(width, height),
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1"
+    ]
+
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    view = memoryview(frame.reshape(-1))
+    filled = 0
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        # Killing ffmpeg closes the pipe, so a stalled decode ends the read
+        # loop instead of blocking the preview request forever
+        deadline = threading.Timer(30, proc.kill)
+        deadline.start()
+        try:
+            while filled < len(view):
+                n = proc.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            proc.wait()
+        finally:
+            deadline.cancel()
+    if proc.returncode != 0 or filled != len(view):
+        return None
+    return frame
+
+
 # ============================================================================
 # Filter Graph Builder
 # ============================================================================
 
+# Filter graphs past either limit are handed to ffmpeg as a script file rather
+# than on the command line, which is capped by ARG_MAX (128 KiB per argument).
+# Multi-clip exports normally encode per-clip segments, so the clip limit only
+# applies to the single-pass graph (export_workers == 1 or a hardware encoder)
+FILTER_SCRIPT_MIN_BYTES = 100_000
+FILTER_SCRIPT_MIN_CLIPS = 64
+
+# Effects whose filter is plain parameter substitution: template + defaults
+_FILTER_TEMPLATES: Dict[EffectType, Tuple[str, Dict[str, Any]]] = {
+    EffectType.BRIGHTNESS: ("eq=brightness={value}", {"value": 0}),
+    EffectType.CONTRAST: ("eq=contrast={value}", {"value": 1}),
+    EffectType.SATURATION: ("eq=saturation={value}", {"value": 1}),
+    EffectType.HUE: ("hue=h={value}", {"value": 0}),
+    EffectType.GAMMA: ("eq=gamma={value}", {"value": 1}),
+    EffectType.BLUR: ("gblur=sigma={sigma}", {"sigma": 5}),
+    EffectType.SHARPEN: ("unsharp=5:5:{amount}:5:5:0", {"amount": 1}),
+    EffectType.DENOISE: ("hqdn3d={strength}", {"strength": 4}),
+    EffectType.GLOW: ("gblur=sigma=20,blend=all_mode=screen:all_opacity={amount}", {"amount": 0.5}),
+    EffectType.CHROMAKEY: ("chromakey={color}:{similarity}:{blend}",
+                           {"color": "0x00FF00", "similarity": 0.3, "blend": 0.1}),
+    EffectType.OPACITY: ("colorchannelmixer=aa={value}", {"value": 1.0}),
+    EffectType.REVERSE: ("reverse", {}),
+    EffectType.FLIP_H: ("hflip", {}),
+    EffectType.FLIP_V: ("vflip", {}),
+}
+
+
+def _template_filter(template: str, defaults: Dict[str, Any]) -> Callable[[Dict[str, Any]], str]:
+    """Bind a filter template once so building a filter is a single format_map."""
+    if not defaults:
+        return lambda p: template
+    fmt = template.format_map
+    return lambda p: fmt(ChainMap(p, defaults))
+
+
+# EffectType -> builder for its FFmpeg filter string (params dict in)
+_EFFECT_FILTERS: Dict[EffectType, Callable[[Dict[str, Any]], str]] = {
+    effect_type: _template_filter(template, defaults)
+    for effect_type, (template, defaults) in _FILTER_TEMPLATES.items()
+}
+_EFFECT_FILTERS[EffectType.VIGNETTE] = lambda p: f"vignette=PI/{2 + p.get('amount', 0.5) * 2}"
+_EFFECT_FILTERS[EffectType.SPEED] = lambda p: f"setpts={1 / p['rate']}*PTS" if p.get("rate", 1.0) != 1.0 else ""
+
+
+@lru_cache(maxsize=4096)
+def _effect_filter_cached(effect_type: EffectType, params_items: Tuple[Tuple[str, Any], ...]) -> str:
+    build = _EFFECT_FILTERS.get(effect_type)
+    return build(dict(params_items)) if build else ""
+
+
+def effect_filter(effect_type: EffectType, params: Dict[str, Any]) -> str:
+    """FFmpeg filter string for an effect type and its params.
+
+    Clips sharing an effect preset reuse one cached string; params holding
+    unhashable values are formatted directly.
+    """
+    try:
+        return _effect_filter_cached(effect_type, tuple(sorted(params.items())))
+    except TypeError:
+        build = _EFFECT_FILTERS.get(effect_type)
+        return build(params) if build else ""
+
+
+# Clip types cut from a source file, and clip types fitted to the canvas
+_TRIMMED_CLIP_TYPES = frozenset({ClipType.VIDEO, ClipType.AUDIO})
+_VISUAL_CLIP_TYPES = frozenset({ClipType.VIDEO, ClipType.IMAGE})
+
+# Effects that are a single eq option: EffectType -> (option, default)
+_EQ_EFFECTS: Dict[EffectType, Tuple[str, Any]] = {
+    EffectType.BRIGHTNESS: ("brightness", 0),
+    EffectType.CONTRAST: ("contrast", 1),
+    EffectType.SATURATION: ("saturation", 1),
+    EffectType.GAMMA: ("gamma", 1),
+}
+
+# Order in which eq applies its luma options internally. Consecutive eq
+# effects are only fused when they already appear in this order, so the
+# merged filter gives the same result as the chain.
+_EQ_LUMA_ORDER = {"contrast": 0, "brightness": 1, "gamma": 2}
+
+
+def _format_eq(options: Dict[str, Any]) -> str:
+    return "eq=" + ":".join(f"{k}={v}" for k, v in options.items())
+
+
+def _can_fuse_eq(options: Dict[str, Any], key: str) -> bool:
+    if key in options:
+        return False
+    rank = _EQ_LUMA_ORDER.get(key)
+    return rank is None or all(_EQ_LUMA_ORDER.get(k, -1) < rank for k in options)
+
+
+def _fit_filter(width: int, height: int) -> str:
+    """Scale into width x height keeping aspect, letterboxed by pad."""
+    return (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2")
+
+
+@lru_cache(maxsize=256)
+def _opacity_filter(opacity: float) -> str:
+    return f"format=rgba,colorchannelmixer=aa={opacity}"
+
+
 class FilterGraphBuilder:
     """Builds FFmpeg filter graphs for clips and timeline."""
 
     def __init__(self, project: Project):
         self.project = project
+        # Fit-to-canvas filters are identical for every unscaled video/image
+        # clip; scaled fits are formatted once per distinct clip.scale
+        w, h = project.width, project.height
+        self.size = (w, h)
+        self._fit_filter = _fit_filter(w, h)
+        self._scaled_fit: Dict[float, Tuple[str, str]] = {}
+        # clip id -> (clip, version, chain)
+        self._chain_cache: Dict[str, Tuple[Clip, int, str]] = {}
 
     def build_effect_filter(self, effect: Effect) -> str:
         """Convert effect to FFmpeg filter string."""
         if not effect.enabled:
             return ""
 
-        p = effect.params
-
-        if effect.type == EffectType.BRIGHTNESS:
-            val = p.get("value", 0)
-            return f"eq=brightness={val}"
-
-        elif effect.type == EffectType.CONTRAST:
-            val = p.get("value", 1)
-            return f"eq=contrast={val}"
-
-        elif effect.type == EffectType.SATURATION:
-            val = p.get("value", 1)
-            return f"eq=saturation={val}"
-
-        elif effect.type == EffectType.HUE:
-            val = p.get("value", 0)
-            return f"hue=h={val}"
-
-        elif effect.type == EffectType.GAMMA:
-            val = p.get("value", 1)
-            return f"eq=gamma={val}"
-
-        elif effect.type == EffectType.BLUR:
-            sigma = p.get("sigma", 5)
-            return f"gblur=sigma={sigma}"
-
-        elif effect.type == EffectType.SHARPEN:
-            amount = p.get("amount", 1)
-            return f"unsharp=5:5:{amount}:5:5:0"
-
-        elif effect.type == EffectType.DENOISE:
-            strength = p.get("strength", 4)
-            return f"hqdn3d={strength}"
-
-        elif effect.type == EffectType.GLOW:
-            amount = p.get("amount", 0.5)
-            return f"gblur=sigma=20,blend=all_mode=screen:all_opacity={amount}"
-
-        elif effect.type == EffectType.VIGNETTE:
-            amount = p.get("amount", 0.5)
-            return f"vignette=PI/{2 + amount * 2}"
-
-        elif effect.type == EffectType.SPEED:
-            rate = p.get("rate", 1.0)
-            if rate != 1.0:
-                return f"setpts={1/rate}*PTS"
-            return ""
-
-        elif effect.type == EffectType.REVERSE:
-            return "reverse"
-
-        elif effect.type == EffectType.CHROMAKEY:
-            color = p.get("color", "0x00FF00")
-            similarity = p.get("similarity", 0.3)
-            blend = p.get("blend", 0.1)
-            return f"chromakey={color}:{similarity}:{blend}"
-
-        elif effect.type == EffectType.OPACITY:
-            val = p.get("value", 1.0)
-            return f"colorchannelmixer=aa={val}"
+        return effect_filter(effect.type, effect.params)
 
-        elif effect.type == EffectType.FLIP_H:
-            return "hflip"
+    def build_clip_filters(self, clip: Clip) -> str:
+        """Build the comma-joined filter chain for a clip ("" if none).
 
-        elif effect.type == EffectType.FLIP_V:
-            return "vflip"
+        Chains are cached until clip.version changes.
+        """
+        chain = self._cached_chain(clip)
+        if chain is not None:
+            return chain
 
-        return ""
-
-    def build_clip_filters(self, clip: Clip) -> List[str]:
-        """Build filter chain for a clip."""
         filters = []
 
         # Trim
-        if clip.type in [ClipType.VIDEO, ClipType.AUDIO]:
+        if clip.type in _TRIMMED_CLIP_TYPES:
             filters.append(f"trim=start={clip.source_in}:end={clip.source_out}")
             filters.append("setpts=PTS-STARTPTS")
 
-        # Scale to project size for video/image
-        if clip.type in [ClipType.VIDEO, ClipType.IMAGE]:
-            w, h = self.project.width, self.project.height
-            filters.append(f"scale={w}:{h}:force_original_aspect_ratio=decrease")
-            filters.append(f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2")
-
-        # Transform
-        if clip.scale != 1.0:
-            sw = int(self.project.width * clip.scale)
-            sh = int(self.project.height * clip.scale)
-            filters.append(f"scale={sw}:{sh}")
+        # Fit video/image to the (scaled) project size in one scale+pad pass
+        if clip.type in _VISUAL_CLIP_TYPES:
+            if clip.scale != 1.0:
+                filters.append(self._scaled(clip.scale)[0])
+            elif self._matches_canvas(clip):
+                filters.append("setsar=1")
+            else:
+                filters.append(self._fit_filter)
+        elif clip.scale != 1.0:
+            filters.append(self._scaled(clip.scale)[1])
 
         if clip.rotation != 0:
             filters.append(f"rotate={clip.rotation}*PI/180:fillcolor=none")
 
-        # Effects
+        # Effects, with runs of eq adjustments fused into one eq filter and
+        # runs of speed changes into one setpts
+        eq_options: Dict[str, Any] = {}
+        speed = 1.0
         for effect in clip.effects:
-            ef = self.build_effect_filter(effect)
+            if not effect.enabled:
+                continue
+            if effect.type == EffectType.SPEED:
+                if eq_options:
+                    filters.append(_format_eq(eq_options))
+                    eq_options = {}
+                speed *= effect.params.get("rate", 1.0)
+                continue
+            if speed != 1.0:
+                filters.append(f"setpts={1 / speed}*PTS")
+                speed = 1.0
+            eq = _EQ_EFFECTS.get(effect.type)
+            if eq is not None:
+                key, default = eq
+                if eq_options and not _can_fuse_eq(eq_options, key):
+                    filters.append(_format_eq(eq_options))
+                    eq_options = {}
+                eq_options[key] = effect.params.get("value", default)
+                continue
+            if eq_options:
+                filters.append(_format_eq(eq_options))
+                eq_options = {}
+            ef = effect_filter(effect.type, effect.params)
             if ef:
                 filters.append(ef)
+        if eq_options:
+            filters.append(_format_eq(eq_options))
+        if speed != 1.0:
+            filters.append(f"setpts={1 / speed}*PTS")
 
         # Opacity (must be last for video)
         if clip.opacity < 1.0 and clip.type != ClipType.AUDIO:
-            filters.append(f"format=rgba,colorchannelmixer=aa={clip.opacity}")
-
+            filters.append(_opacity_filter(clip.opacity))
+
+        chain = ",".join(filters)
+        self._chain_cache[clip.id] = (clip, clip.version, chain)
+        return chain
+
+    def _scaled(self, scale: float) -> Tuple[str, str]:
+        """(fit, plain scale) filters for the canvas scaled by scale."""
+        filters = self._scaled_fit.get(scale)
+        if filters is None:
+            sw = int(self.project.width * scale)
+            sh = int(self.project.height * scale)
+            filters = self._scaled_fit[scale] = (_fit_filter(sw, sh), f"scale={sw}:{sh}")
         return filters
 
+    def _matches_canvas(self, clip: Clip) -> bool:
+        """True if the clip's source already decodes at the project size."""
+        media = self.project.get_media(clip.media_id) if clip.media_id else None
+        if media is None:
+            return False
+        size = (media.height, media.width) if media.rotation in (90, 270) else (media.width, media.height)
+        return size == self.size
+
+    def build_chains(self, clips: List[Clip]) -> List[str]:
+        """Filter chains for many clips, in order.
+
+        Built serially: a chain takes a few microseconds, far less than
+        shipping the clip to a worker process, and threads would share the GIL.
+        """
+        build = self.build_clip_filters
+        return [build(c) for c in clips]
+
+    def _cached_chain(self, clip: Clip) -> Optional[str]:
+        cached = self._chain_cache.get(clip.id)
+        if cached is not None and cached[0] is clip and cached[1] == clip.version:
+            return cached[2]
+        return None
+
     def build_audio_filters(self, clip: Clip) -> List[str]:
         """Build audio filter chain for a clip."""
         filters = []
@@ -361,20 +849,26 @@ class FilterGraphBuilder:
         filters.append(f"atrim=start={clip.source_in}:end={clip.source_out}")
         filters.append("asetpts=PTS-STARTPTS")
 
-        # Volume
-        if clip.volume != 1.0:
-            filters.append(f"volume={clip.volume}")
-
-        # Mute
+        # Volume, or silence when muted, as one volume filter
         if clip.muted:
             filters.append("volume=0")
+        elif clip.volume != 1.0:
+            filters.append(f"volume={clip.volume}")
 
-        # Speed (affects audio too)
+        # Speed (affects audio too), with all speed effects combined
+        rate = 1.0
         for effect in clip.effects:
             if effect.type == EffectType.SPEED and effect.enabled:
-                rate = effect.params.get("rate", 1.0)
-                if rate != 1.0:
-                    filters.append(f"atempo={rate}")
+                rate *= effect.params.get("rate", 1.0)
+        # atempo only accepts 0.5-100, so split factors outside that range
+        while rate < 0.5:
+            filters.append("atempo=0.5")
+            rate /= 0.5
+        while rate > 100.0:
+            filters.append("atempo=100")
+            rate /= 100.0
+        if rate != 1.0:
+            filters.append(f"atempo={rate}")
 
         return filters
 
@@ -392,11 +886,57 @@ class VideoEditorEngine:
         self.upload_dir.mkdir(exist_ok=True)
         self.cache_dir = Path("editor_cache")
         self.cache_dir.mkdir(exist_ok=True)
+        # Encoded preview PNGs keyed by (clip id, source time, width, height),
+        # most recently used last, plus the keys held for each clip
+        self.preview_cache: "OrderedDict[Tuple[str, float, int, int], bytes]" = OrderedDict()
+        self.preview_cache_size = 256
+        self._cache_index: Dict[str, set] = {}
+        self._black_frames: Dict[Tuple[int, int], bytes] = {}
+        # Preview PNGs are also written to cache_dir off the request path, as a
+        # second tier behind preview_cache; one worker keeps writes and
+        # invalidation unlinks in order
+        self._disk_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-disk")
 
         # Export state
         self.is_exporting = False
         self.export_progress = 0.0
         self.export_cancel = False
+        # Multi-clip exports encode one segment per clip in parallel, then
+        # stream-copy concat them; x264 threads internally, so use half the cores
+        self.export_workers = max(1, (os.cpu_count() or 2) // 2)
+        # Temp files (filter scripts) belonging to the running export
+        self._export_temp_paths: List[str] = []
+        self._filter_builder: Optional[FilterGraphBuilder] = None
+        # Prefer a GPU H.264 encoder when one works; probed on first export
+        self.hardware_encoding = True
+        self._available_encoders: Optional[List[str]] = None
+
+        # ffprobe results persisted across sessions, oldest first:
+        # path -> {"size", "mtime_ns", "probe"}
+        self.probe_cache_max_entries = 4096
+        # New entries are written out this many seconds after a single import,
+        # right after a batch import, and at exit
+        self.probe_cache_save_delay = 2.0
+        self._probe_cache_path = (self.cache_dir / "probe_cache.json").resolve()
+        self._probe_cache: Dict[str, Dict[str, Any]] = {}
+        self._probe_lock = threading.Lock()
+        # Serializes writers of the cache file; held without _probe_lock
+        # while serializing, so probes can keep updating the cache
+        self._probe_save_lock = threading.Lock()
+        self._probe_cache_dirty = False
+        self._probe_save_timer: Optional[threading.Timer] = None
+        # Batch imports overlap their ffprobe subprocesses on this pool
+        self._probe_pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4),
+                                              thread_name_prefix="ffprobe")
+        try:
+            self._probe_cache = json.loads(self._probe_cache_path.read_text())
+        except (OSError, ValueError):
+            pass
+        # Entries for deleted files are pruned once here rather than on every save
+        self._probe_cache = {
+            path: entry for path, entry in self._probe_cache.items() if os.path.exists(path)
+        }
+        atexit.register(self.flush_probe_cache)
 
     # ========================================================================
     # Project Management
@@ -433,6 +973,7 @@ class VideoEditorEngine:
             if hasattr(self.project, key):
                 setattr(self.project, key, value)
 
+        self.project.reindex()
         self._clear_cache()
         return self.project
 
@@ -447,7 +988,7 @@ class VideoEditorEngine:
             raise FileNotFoundError(f"File not found: {file_path}")
 
         # Get metadata
-        probe = run_ffprobe(str(path))
+        probe = self._probe(str(path))
 
         media = MediaFile(
             path=str(path.absolute()),
@@ -468,14 +1009,10 @@ class VideoEditorEngine:
                 media.width = stream.get("width", 0)
                 media.height = stream.get("height", 0)
                 media.codec = stream.get("codec_name", "")
+                media.rotation = _stream_rotation(stream)
 
                 # Parse FPS
-                fps_str = stream.get("r_frame_rate", "30/1")
-                try:
-                    num, den = map(int, fps_str.split("/"))
-                    media.fps = num / den if den else 30.0
-                except:
-                    media.fps = 30.0
+                media.fps = parse_frame_rate(stream.get("r_frame_rate", "30/1"))
 
             elif codec_type == "audio":
                 if not media.type:
@@ -491,10 +1028,93 @@ class VideoEditorEngine:
 
         # Add to project
         if self.project:
-            self.project.media.append(media)
+            self.project.add_media(media)
 
         return media
 
+    async def import_media_many(self, file_paths: List[str]) -> List[MediaFile]:
+        """Import several media files, running their ffprobe calls concurrently."""
+        # Warm the probe cache in parallel, then import in order from the cache
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._probe_pool, self._probe, p, False) for p in file_paths),
+            return_exceptions=True,
+        )
+        self.flush_probe_cache()
+        return [self.import_media(p) for p in file_paths]
+
+    def _cached_probe(self, path: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        entry = self._probe_cache.get(path)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["probe"]
+        return None
+
+    def _probe(self, path: str, save: bool = True) -> Dict[str, Any]:
+        """ffprobe a file, reusing results saved by earlier sessions.
+
+        New results are written out by a debounced save; batch imports pass
+        save=False and flush once afterwards.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        probe = self._cached_probe(path, st)
+        if probe is not None:
+            return probe
+
+        probe = run_ffprobe(path)
+        with self._probe_lock:
+            # Re-inserting moves the entry to the newest end for pruning
+            self._probe_cache.pop(path, None)
+            self._probe_cache[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "probe": probe}
+            self._probe_cache_dirty = True
+            if save and self._probe_save_timer is None:
+                self._probe_save_timer = threading.Timer(self.probe_cache_save_delay,
+                                                         self.flush_probe_cache)
+                self._probe_save_timer.daemon = True
+                self._probe_save_timer.start()
+        return probe
+
+    def flush_probe_cache(self):
+        """Atomically rewrite the persisted probe cache if it has new entries."""
+        with self._probe_save_lock:
+            with self._probe_lock:
+                if self._probe_save_timer is not None:
+                    self._probe_save_timer.cancel()
+                    self._probe_save_timer = None
+                if not self._probe_cache_dirty:
+                    return
+                self._probe_cache_dirty = False
+                excess = len(self._probe_cache) - self.probe_cache_max_entries
+                for path in list(itertools.islice(self._probe_cache, max(0, excess))):
+                    del self._probe_cache[path]
+                snapshot = dict(self._probe_cache)
+
+            # Write a sibling temp file and swap it in, so a crash mid-write
+            # never leaves a truncated cache behind
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile("w", dir=self._probe_cache_path.parent,
+                                                 suffix=".json.tmp", delete=False) as f:
+                    tmp_path = f.name
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self._probe_cache_path)
+            except OSError:
+                with self._probe_lock:
+                    self._probe_cache_dirty = True
+                if tmp_path is not None:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+
+    def _probe_duration(self, path: str) -> float:
+        """Container duration, from the saved probe when the file was imported."""
+        path = os.path.abspath(path)
+        probe = self._cached_probe(path, os.stat(path))
+        if probe is not None and "duration" in probe.get("format", {}):
+            return float(probe["format"]["duration"])
+        return probe_duration(path)
+
     def upload_media(self, filename: str, content: bytes) -> MediaFile:
         """Upload and import media file."""
         # Save file
@@ -505,6 +1125,20 @@ class VideoEditorEngine:
         # Import
         return self.import_media(str(file_path))
 
+    def upload_media_many(self, files: List[Tuple[str, bytes]]) -> List[MediaFile]:
+        """Upload several (filename, content) files, probing them in parallel."""
+        paths = []
+        for filename, content in files:
+            file_path = self.upload_dir / filename
+            with open(file_path, "wb") as f:
+                f.write(content)
+            paths.append(str(file_path))
+
+        # Failures resurface from import_media below
+        wait([self._probe_pool.submit(self._probe, p, False) for p in paths])
+        self.flush_probe_cache()
+        return [self.import_media(p) for p in paths]
+
     def get_media(self) -> List[MediaFile]:
         """Get all imported media."""
         return self.project.media if self.project else []
@@ -514,7 +1148,7 @@ class VideoEditorEngine:
         if not self.project:
             return False
 
-        self.project.media = [m for m in self.project.media if m.id != media_id]
+        self.project.remove_media(media_id)
         return True
 
     # ========================================================================
@@ -528,17 +1162,15 @@ class VideoEditorEngine:
 
         order = len(self.project.tracks)
         track = Track(name=name, type=track_type, order=order)
-        self.project.tracks.append(track)
-        return track
+        return self.project.add_track(track)
 
     def remove_track(self, track_id: str) -> bool:
         """Remove a track and its clips."""
         if not self.project:
             return False
 
-        self.project.tracks = [t for t in self.project.tracks if t.id != track_id]
-        self.project.clips = [c for c in self.project.clips if c.track_id != track_id]
-        self._clear_cache()
+        for clip in self.project.remove_track(track_id):
+            self._invalidate_clip(clip.id)
         return True
 
     def update_track(self, track_id: str, updates: Dict[str, Any]) -> Optional[Track]:
@@ -546,13 +1178,14 @@ class VideoEditorEngine:
         if not self.project:
             return None
 
-        for track in self.project.tracks:
-            if track.id == track_id:
-                for key, value in updates.items():
-                    if hasattr(track, key):
-                        setattr(track, key, value)
-                return track
-        return None
+        track = self.project.get_track(track_id)
+        if not track:
+            return None
+
+        for key, value in updates.items():
+            if key != "id" and hasattr(track, key):
+                setattr(track, key, value)
+        return track
 
     # ========================================================================
     # Clip Management
@@ -579,37 +1212,36 @@ class VideoEditorEngine:
         # Auto-detect duration from media
         if clip.source_path and clip.source_out == 0:
             try:
-                probe = run_ffprobe(clip.source_path)
-                duration = float(probe.get("format", {}).get("duration", 5))
-                clip.source_out = duration
+                clip.source_out = self._probe_duration(clip.source_path)
             except:
                 clip.source_out = 5.0
 
-        self.project.clips.append(clip)
-        self._clear_cache()
-        return clip
+        return self.project.add_clip(clip)
 
     def update_clip(self, clip_id: str, updates: Dict[str, Any]) -> Optional[Clip]:
         """Update clip properties."""
         if not self.project:
             return None
 
-        for clip in self.project.clips:
-            if clip.id == clip_id:
-                for key, value in updates.items():
-                    if hasattr(clip, key):
-                        setattr(clip, key, value)
-                self._clear_cache()
-                return clip
-        return None
+        clip = self.project.get_clip(clip_id)
+        if not clip:
+            return None
+
+        for key, value in updates.items():
+            if key not in ("id", "version") and hasattr(clip, key):
+                setattr(clip, key, value)
+        clip.version += 1
+        self._invalidate_clip(clip.id)
+        self.project.invalidate_timeline()
+        return clip
 
     def remove_clip(self, clip_id: str) -> bool:
         """Remove a clip."""
         if not self.project:
             return False
 
-        self.project.clips = [c for c in self.project.clips if c.id != clip_id]
-        self._clear_cache()
+        self.project.remove_clip(clip_id)
+        self._invalidate_clip(clip_id)
         return True
 
     def split_clip(self, clip_id: str, split_time: float) -> Tuple[Optional[Clip], Optional[Clip]]:
@@ -617,7 +1249,7 @@ class VideoEditorEngine:
         if not self.project:
             return None, None
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return None, None
 
@@ -645,15 +1277,16 @@ class VideoEditorEngine:
             rotation=clip.rotation,
             opacity=clip.opacity,
             volume=clip.volume,
-            effects=[Effect(**asdict(e)) for e in clip.effects],
+            effects=[replace(e, id=str(uuid.uuid4()), params=dict(e.params)) for e in clip.effects],
         )
 
         # Modify first clip
         clip.source_out = source_split
         clip.name = f"{clip.name} (1)"
+        clip.version += 1
 
-        self.project.clips.append(clip2)
-        self._clear_cache()
+        self.project.add_clip(clip2)
+        self._invalidate_clip(clip.id)
         return clip, clip2
 
     # ========================================================================
@@ -665,7 +1298,7 @@ class VideoEditorEngine:
         if not self.project:
             return None
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return None
 
@@ -674,7 +1307,8 @@ class VideoEditorEngine:
             params=params or {}
         )
         clip.effects.append(effect)
-        self._clear_cache()
+        clip.version += 1
+        self._invalidate_clip(clip.id)
         return effect
 
     def update_effect(self, clip_id: str, effect_id: str, updates: Dict[str, Any]) -> Optional[Effect]:
@@ -682,7 +1316,7 @@ class VideoEditorEngine:
         if not self.project:
             return None
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return None
 
@@ -693,7 +1327,8 @@ class VideoEditorEngine:
                         effect.params.update(value)
                     elif hasattr(effect, key):
                         setattr(effect, key, value)
-                self._clear_cache()
+                clip.version += 1
+                self._invalidate_clip(clip.id)
                 return effect
         return None
 
@@ -702,12 +1337,13 @@ class VideoEditorEngine:
         if not self.project:
             return False
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return False
 
         clip.effects = [e for e in clip.effects if e.id != effect_id]
-        self._clear_cache()
+        clip.version += 1
+        self._invalidate_clip(clip.id)
         return True
 
     # ========================================================================
@@ -720,7 +1356,7 @@ class VideoEditorEngine:
         if not self.project:
             return False
 
-        clip = next((c for c in self.project.clips if c.id == clip_id), None)
+        clip = self.project.get_clip(clip_id)
         if not clip:
             return False
 
@@ -734,7 +1370,8 @@ class VideoEditorEngine:
         else:
             clip.transition_out = transition
 
-        self._clear_cache()
+        clip.version += 1
+        self._invalidate_clip(clip.id)
         return True
 
     # ========================================================================
@@ -748,9 +1385,7 @@ class VideoEditorEngine:
             return self._generate_black_frame(width, height)
 
         # Find clips at this time
-        active_clips = [c for c in self.project.clips
-                       if c.start_time <= time < c.end_time
-                       and c.type in [ClipType.VIDEO, ClipType.IMAGE]]
+        active_clips = self.project.clips_at(time, visual_only=True)
 
         if not active_clips:
             return self._generate_black_frame(width, height)
@@ -760,47 +1395,95 @@ class VideoEditorEngine:
         source_time = clip.source_in + (time - clip.start_time)
 
         # Check cache
-        cache_key = f"{clip.id}_{source_time:.2f}_{width}_{height}"
-        cache_path = self.cache_dir / f"{cache_key}.png"
-
-        if cache_path.exists():
-            return cache_path.read_bytes()
-
-        # Extract frame
+        cache_key = (clip.id, round(source_time, 2), width, height)
+        cached = self.preview_cache.get(cache_key)
+        if cached is not None:
+            self.preview_cache.move_to_end(cache_key)
+            return cached
+
+        # The version in the name keeps frames from before an edit unreadable
+        cache_path = self.cache_dir / f"{clip.id}_{clip.version}_{source_time:.2f}_{width}_{height}.png"
+        try:
+            png = cache_path.read_bytes()
+            self._remember_preview(cache_key, png)
+            return png
+        except OSError:
+            pass
+
+        # Extract frame as raw RGB and encode the PNG here, with fast
+        # compression, instead of round-tripping through an image file
         try:
-            if extract_frame(clip.source_path, source_time, str(cache_path), width, height):
-                return cache_path.read_bytes()
+            frame = read_frame_rgb(clip.source_path, source_time, width, height)
+            if frame is not None:
+                from PIL import Image as PILImage
+                buf = io.BytesIO()
+                PILImage.fromarray(frame).save(buf, format="PNG", compress_level=1)
+                png = buf.getvalue()
+                self._remember_preview(cache_key, png)
+                self._disk_writer.submit(cache_path.write_bytes, png)
+                return png
         except Exception as e:
             print(f"Preview error: {e}")
 
         return self._generate_black_frame(width, height)
 
-    def _generate_black_frame(self, width: int, height: int) -> bytes:
-        """Generate a black frame."""
-        cache_path = self.cache_dir / f"black_{width}_{height}.png"
+    def _remember_preview(self, cache_key: Tuple[str, float, int, int], png: bytes):
+        """Add a preview PNG to the in-memory LRU cache."""
+        self.preview_cache[cache_key] = png
+        self._cache_index.setdefault(cache_key[0], set()).add(cache_key)
+        while len(self.preview_cache) > self.preview_cache_size:
+            old_key, _ = self.preview_cache.popitem(last=False)
+            keys = self._cache_index.get(old_key[0])
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del self._cache_index[old_key[0]]
 
-        if not cache_path.exists():
-            cmd = [
-                "ffmpeg", "-y",
-                "-f", "lavfi",
-                "-i", f"color=black:s={width}x{height}:d=1",
-                "-frames:v", "1",
-                str(cache_path)
-            ]
-            subprocess.run(cmd, capture_output=True, timeout=10)
+    def _generate_black_frame(self, width: int, height: int) -> bytes:
+        """Generate a black frame, kept in memory for the session."""
+        png = self._black_frames.get((width, height))
+        if png is not None:
+            return png
 
-        if cache_path.exists():
-            return cache_path.read_bytes()
-        return b""
+        cache_path = self.cache_dir / f"black_{width}_{height}.png"
+        try:
+            png = cache_path.read_bytes()
+        except OSError:
+            png = solid_png(width, height)
+            try:
+                cache_path.write_bytes(png)
+            except OSError:
+                pass
+        self._black_frames[(width, height)] = png
+        return png
+
+    def _invalidate_clip(self, clip_id: str):
+        """Drop cached preview frames of one clip after it was edited."""
+        for key in self._cache_index.pop(clip_id, ()):
+            self.preview_cache.pop(key, None)
+        self._disk_writer.submit(self._unlink_previews, f"{clip_id}_")
+
+    def _unlink_previews(self, prefix: str = ""):
+        """Delete preview PNGs in cache_dir whose names start with prefix."""
+        # scandir reuses the entry type from readdir instead of a Path + stat per file
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                name = entry.name
+                if (name.startswith(prefix) and name.endswith(".png")
+                        and not name.startswith("black_")):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
 
     def _clear_cache(self):
-        """Clear preview cache."""
-        for f in self.cache_dir.glob("*.png"):
-            if not f.name.startswith("black_"):
-                try:
-                    f.unlink()
-                except:
-                    pass
+        """Clear all preview frames and derived timeline state after a
+        project-wide change (new project, canvas settings)."""
+        if self.project:
+            self.project.invalidate_timeline()
+        self.preview_cache.clear()
+        self._cache_index.clear()
+        self._disk_writer.submit(self._unlink_previews)
 
     # ========================================================================
     # Export
@@ -819,13 +1502,16 @@ class VideoEditorEngine:
         try:
             # Get video clips sorted by start time
             video_clips = sorted(
-                [c for c in self.project.clips if c.type in [ClipType.VIDEO, ClipType.IMAGE]],
+                [c for c in self.project.clips if c.type in _VISUAL_CLIP_TYPES],
                 key=lambda c: c.start_time
             )
 
             if not video_clips:
                 return False
 
+            if len(video_clips) > 1 and self._segment_workers(format) > 1:
+                return self._export_segments(video_clips, output_path, format, quality)
+
             # Build FFmpeg command
             cmd = self._build_export_command(video_clips, output_path, format, quality)
 
@@ -833,25 +1519,21 @@ class VideoEditorEngine:
             process = subprocess.Popen(
                 cmd,
                 stderr=subprocess.PIPE,
-                universal_newlines=True
+                bufsize=65536
             )
 
             duration = self.project.duration
+            scale = 1.0 / duration if duration > 0 else 0.0
 
             # Parse progress
-            for line in process.stderr:
+            for line in iter_stderr_lines(process.stderr):
                 if self.export_cancel:
                     process.kill()
                     return False
 
-                if "time=" in line:
-                    try:
-                        time_str = line.split("time=")[1].split()[0]
-                        parts = time_str.split(":")
-                        current_time = float(parts[0]) * 3600 + float(parts[1]) * 60 + float(parts[2])
-                        self.export_progress = min(current_time / duration, 1.0) if duration > 0 else 0
-                    except:
-                        pass
+                current_time = parse_ffmpeg_time(line)
+                if current_time is not None:
+                    self.export_progress = min(current_time * scale, 1.0)
 
             process.wait()
             self.export_progress = 1.0
@@ -862,49 +1544,186 @@ class VideoEditorEngine:
             return False
         finally:
             self.is_exporting = False
+            for path in self._export_temp_paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            self._export_temp_paths.clear()
+
+    def _export_segments(self, clips: List[Clip], output_path: str,
+                         format: str, quality: str) -> bool:
+        """Encode each clip as its own segment in parallel, then concat them
+        without re-encoding."""
+        total = sum(c.duration for c in clips)
+        # Leave the last percent for the concat step
+        scale = 0.99 / total if total > 0 else 0.0
+        done = [0.0] * len(clips)
+        done_total = 0.0
+        processes: List[subprocess.Popen] = []
+        lock = threading.Lock()
+
+        def encode(i: int, segment_path: str) -> bool:
+            cmd = self._build_segment_command(clips[i], segment_path, format, quality)
+            with lock:
+                if self.export_cancel:
+                    return False
+                process = subprocess.Popen(cmd, stderr=subprocess.PIPE,
+                                           bufsize=65536)
+                processes.append(process)
+            nonlocal done_total
+            clip_duration = clips[i].duration
+            for line in iter_stderr_lines(process.stderr):
+                current_time = parse_ffmpeg_time(line)
+                if current_time is not None:
+                    current_time = min(current_time, clip_duration)
+                    # Running total instead of re-summing every segment per line
+                    with lock:
+                        done_total += current_time - done[i]
+                        done[i] = current_time
+                        self.export_progress = min(done_total * scale, 0.99)
+            process.wait()
+            return process.returncode == 0
+
+        with tempfile.TemporaryDirectory(prefix="export_", dir=Path(output_path).parent) as tmp:
+            segments = [os.path.join(tmp, f"segment_{i:04d}.{format}") for i in range(len(clips))]
+
+            with ThreadPoolExecutor(max_workers=self.export_workers) as pool:
+                futures = [pool.submit(encode, i, seg) for i, seg in enumerate(segments)]
+                pending = set(futures)
+                while pending:
+                    _, pending = wait(pending, timeout=0.2)
+                    if self.export_cancel:
+                        with lock:
+                            for process in processes:
+                                process.kill()
+                ok = all(f.result() for f in futures)
+
+            if not ok or self.export_cancel:
+                return False
+
+            list_path = os.path.join(tmp, "segments.txt")
+            with open(list_path, "w") as f:
+                for seg in segments:
+                    escaped = seg.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            result = subprocess.run(
+                ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+                 "-c", "copy", output_path],
+                capture_output=True, text=True,
+            )
+
+        self.export_progress = 1.0
+        return result.returncode == 0
+
+    def _get_filter_builder(self) -> FilterGraphBuilder:
+        """Filter builder for the current project, kept across exports so
+        unchanged clips reuse their cached chains."""
+        builder = self._filter_builder
+        if (builder is None or builder.project is not self.project
+                or builder.size != (self.project.width, self.project.height)):
+            builder = self._filter_builder = FilterGraphBuilder(self.project)
+        return builder
+
+    def _build_segment_command(self, clip: Clip, output_path: str,
+                               format: str, quality: str) -> List[str]:
+        """Build the FFmpeg command encoding a single clip segment."""
+        chain = self._get_filter_builder().build_clip_filters(clip) or "null"
+
+        cmd = ["ffmpeg", "-y"]
+        # Segments encode export_workers at a time, so split the cores
+        cmd.extend(self._thread_args(self.export_workers))
+        cmd.extend(["-i", clip.source_path])
+        cmd.extend(self._filter_graph_args(f"[0:v]{chain}[vout]", 1))
+        cmd.extend(["-map", "[vout]"])
+        cmd.extend(self._encoding_args(format, quality))
+        cmd.append(output_path)
+        return cmd
+
+    def _segment_workers(self, format: str) -> int:
+        """How many segments a multi-clip export may encode at once.
+
+        A GPU encoder is the bottleneck on its own, and consumer drivers cap
+        concurrent sessions (NVENC), so hardware exports stay single-pass.
+        """
+        if format == "mp4" and self._h264_encoder() != "libx264":
+            return 1
+        return self.export_workers
+
+    def _h264_encoder(self) -> str:
+        """H.264 encoder for exports: the first working hardware one, else libx264."""
+        if not self.hardware_encoding:
+            return "libx264"
+        if self._available_encoders is None:
+            self._available_encoders = probe_hardware_encoders(self.cache_dir / "encoders.json")
+        return self._available_encoders[0] if self._available_encoders else "libx264"
+
+    def _thread_args(self, processes: int = 1) -> List[str]:
+        """Global options letting filter graphs use this process's share of
+        the cores."""
+        n = str(max(1, (os.cpu_count() or 4) // processes))
+        return ["-filter_threads", n, "-filter_complex_threads", n]
+
+    def _encoding_args(self, format: str, quality: str) -> List[str]:
+        """Encoder settings shared by full and segment exports."""
+        args = []
+        pix_fmt = "yuv420p"
+        if format == "mp4":
+            encoder = self._h264_encoder()
+            presets = _H264_ENCODERS[encoder]
+            args.extend(["-c:v", encoder])
+            args.extend(presets.get(quality, presets["low"]))
+            pix_fmt = _ENCODER_PIX_FMTS.get(encoder, pix_fmt)
+
+        args.extend(["-pix_fmt", pix_fmt, "-threads", "0"])
+        return args
+
+    def _filter_graph_args(self, graph: str, clip_count: int) -> List[str]:
+        """-filter_complex arguments, moving large graphs to a script file.
+
+        Script files are removed once the running export finishes.
+        """
+        if len(graph) > FILTER_SCRIPT_MIN_BYTES or clip_count > FILTER_SCRIPT_MIN_CLIPS:
+            with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".filter",
+                                             delete=False) as f:
+                f.write(graph)
+            self._export_temp_paths.append(f.name)
+            return ["-filter_complex_script", f.name]
+        return ["-filter_complex", graph]
 
     def _build_export_command(self, clips: List[Clip], output_path: str,
                                format: str, quality: str) -> List[str]:
         """Build FFmpeg export command."""
         cmd = ["ffmpeg", "-y"]
+        cmd.extend(self._thread_args())
 
         # Add inputs
         for clip in clips:
             cmd.extend(["-i", clip.source_path])
 
-        # Build filter graph
-        filter_builder = FilterGraphBuilder(self.project)
-        filter_parts = []
-
-        for i, clip in enumerate(clips):
-            # Video filters
-            v_filters = filter_builder.build_clip_filters(clip)
-            if v_filters:
-                filter_parts.append(f"[{i}:v]{','.join(v_filters)}[v{i}]")
-            else:
-                filter_parts.append(f"[{i}:v]null[v{i}]")
+        # Build filter graph in one pass: a chain per clip plus the output
+        # node. Stream labels are hex so they stay short on long timelines.
+        chains = self._get_filter_builder().build_chains(clips)
+        labels = [f"[v{i:x}]" for i in range(len(clips))]
+        buf = io.StringIO()
+        for i, chain in enumerate(chains):
+            buf.write(f"[{i}:v]")
+            buf.write(chain or "null")
+            buf.write(labels[i])
+            buf.write(";")
 
         # Concat if multiple clips (simple version - no transitions)
         if len(clips) > 1:
-            inputs = "".join(f"[v{i}]" for i in range(len(clips)))
-            filter_parts.append(f"{inputs}concat=n={len(clips)}:v=1:a=0[vout]")
+            buf.write(f"{''.join(labels)}concat=n={len(clips)}:v=1:a=0[vout]")
         else:
-            filter_parts.append(f"[v0]null[vout]")
+            buf.write(f"{labels[0]}null[vout]")
 
-        cmd.extend(["-filter_complex", ";".join(filter_parts)])
+        cmd.extend(self._filter_graph_args(buf.getvalue(), len(clips)))
         cmd.extend(["-map", "[vout]"])
 
         # Encoding settings
-        if format == "mp4":
-            cmd.extend(["-c:v", "libx264"])
-            if quality == "high":
-                cmd.extend(["-crf", "18", "-preset", "slow"])
-            elif quality == "medium":
-                cmd.extend(["-crf", "23", "-preset", "medium"])
-            else:
-                cmd.extend(["-crf", "28", "-preset", "fast"])
-
-        cmd.extend(["-pix_fmt", "yuv420p"])
+        cmd.extend(self._encoding_args(format, quality))
         cmd.append(output_path)
 
         return cmd
@@ -4,15 +4,29 @@ FastAPI main application for OneTrainer Web UI.
 Provides REST API and WebSocket endpoints for managing OneTrainer training sessions.
 """
 import asyncio
+import importlib
+import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 
-from web_ui.backend.services.trainer_service import get_trainer_service
+from web_ui.backend.middleware import ErrorMiddleware, FastCORS
+from web_ui.backend.responses import FastJSONResponse
+from web_ui.backend.static_files import PrecompressedStaticFiles
+from web_ui.backend.services.trainer_service import get_trainer_service, encode_message
+
+
+logger = logging.getLogger(__name__)
+
+# Reply to application-level WebSocket pings; constant, so never re-encoded
+PONG_MESSAGE = '{"type":"pong"}'
+
+# The trainer service is a process-wide singleton; bind it once instead of
+# looking it up on every request
+trainer_service = get_trainer_service()
 
 
 @asynccontextmanager
@@ -23,20 +37,19 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     Handles initialization and cleanup of the trainer service.
     """
     # Startup
-    print("OneTrainer Web UI starting up...")
-    trainer_service = get_trainer_service()
+    logger.info("OneTrainer Web UI starting up...")
 
     # Set the event loop for async broadcasting from training threads
     try:
         loop = asyncio.get_running_loop()
         trainer_service.set_event_loop(loop)
     except RuntimeError:
-        print("Warning: Could not get running event loop for trainer service")
+        logger.warning("Could not get running event loop for trainer service")
 
     yield
 
     # Shutdown
-    print("OneTrainer Web UI shutting down...")
+    logger.info("OneTrainer Web UI shutting down...")
     trainer_service.cleanup()
 
 
@@ -48,9 +61,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost, so error responses still get CORS and compression applied
+app.add_middleware(ErrorMiddleware)
+
 # Configure CORS for local development
 app.add_middleware(
-    CORSMiddleware,
+    FastCORS,
     allow_origins=[
         "http://localhost:3000",  # React dev server
         "http://localhost:5173",  # Vite dev server
@@ -58,12 +74,15 @@ app.add_middleware(
         "http://127.0.0.1:5173",
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "X-Request-Id"],
 )
 
+# Compress JSON and HTML responses; prebuilt assets carry their own encoding
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 
-@app.get("/api")
+@app.get("/api", response_class=FastJSONResponse)
 async def api_root():
     """API root endpoint."""
     return {
@@ -73,17 +92,11 @@ async def api_root():
     }
 
 
-@app.get("/health")
+@app.get("/health", response_class=FastJSONResponse)
 async def health_check():
     """Health check endpoint."""
-    trainer_service = get_trainer_service()
-    state = trainer_service.get_state()
-
-    return {
-        "status": "healthy",
-        "training_active": state.get("is_training", False),
-        "trainer_status": state.get("status", "unknown")
-    }
+    # Prebuilt by the trainer service whenever its state changes
+    return Response(trainer_service.health_json, media_type="application/json")
 
 
 @app.websocket("/ws")
@@ -96,29 +109,27 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     await websocket.accept()
 
-    trainer_service = get_trainer_service()
-    trainer_service.register_websocket(websocket)
-
     try:
-        # Send initial state
-        await websocket.send_json({
+        # Send initial state before registering so it can't race the relay task
+        await websocket.send_text(encode_message({
             "type": "connected",
             "data": trainer_service.get_state()
-        })
-
-        # Keep connection alive and handle incoming messages
-        while True:
-            # Receive messages from client (for ping/pong, commands, etc.)
-            data = await websocket.receive_text()
+        }))
+        trainer_service.register_websocket(websocket)
 
-            # Handle ping
+        # Keepalive is handled by protocol-level ping frames (see
+        # server_options); a text "ping" is still answered for clients that
+        # send their own, through the relay queue so sends never overlap
+        async for data in websocket.iter_text():
             if data == "ping":
-                await websocket.send_json({"type": "pong"})
+                trainer_service.send_to(websocket, PONG_MESSAGE)
+
+        trainer_service.unregister_websocket(websocket)
 
     except WebSocketDisconnect:
         trainer_service.unregister_websocket(websocket)
-    except Exception as e:
-        print(f"WebSocket error: {e}")
+    except Exception:
+        logger.exception("WebSocket error")
         trainer_service.unregister_websocket(websocket)
         try:
             await websocket.close()
@@ -127,133 +138,130 @@ async def websocket_endpoint(websocket: WebSocket):
 
 
 # Import and include routers
-# Note: These will be created separately
-try:
-    from web_ui.backend.api import training, config, samples, system, filesystem, concepts, queue, inference, tensorboard, caption, plugins, database, tools, settings
-
-    app.include_router(
-        training.router,
-        prefix="/api/training",
-        tags=["training"]
-    )
-    app.include_router(
-        config.router,
-        prefix="/api/config",
-        tags=["config"]
-    )
-    app.include_router(
-        samples.router,
-        prefix="/api/samples",
-        tags=["samples"]
-    )
-    app.include_router(
-        system.router,
-        prefix="/api/system",
-        tags=["system"]
-    )
-    app.include_router(
-        filesystem.router,
-        prefix="/api/filesystem",
-        tags=["filesystem"]
-    )
-    app.include_router(
-        concepts.router,
-        prefix="/api/concepts",
-        tags=["concepts"]
-    )
-    app.include_router(
-        queue.router,
-        prefix="/api/queue",
-        tags=["queue"]
-    )
-    app.include_router(
-        inference.router,
-        prefix="/api/inference",
-        tags=["inference"]
-    )
-    app.include_router(
-        tensorboard.router,
-        prefix="/api/tensorboard",
-        tags=["tensorboard"]
-    )
-    app.include_router(
-        caption.router,
-        prefix="/api/caption",
-        tags=["caption"]
-    )
-    app.include_router(
-        plugins.router,
-        prefix="/api/plugins",
-        tags=["plugins"]
-    )
-    app.include_router(
-        database.router,
-        prefix="/api/db",
-        tags=["database"]
-    )
-    app.include_router(
-        tools.router,
-        prefix="/api/tools",
-        tags=["tools"]
-    )
-    app.include_router(
-        settings.router,
-        prefix="/api",
-        tags=["settings"]
-    )
-except ImportError as e:
-    print(f"Warning: Could not import API routers: {e}")
-    print("API routes will not be available until routers are created.")
+# (module name, URL prefix, tag); settings carries its own /settings prefix
+ROUTER_SPECS = [
+    ("training", "/api/training", "training"),
+    ("config", "/api/config", "config"),
+    ("samples", "/api/samples", "samples"),
+    ("system", "/api/system", "system"),
+    ("filesystem", "/api/filesystem", "filesystem"),
+    ("concepts", "/api/concepts", "concepts"),
+    ("queue", "/api/queue", "queue"),
+    ("tensorboard", "/api/tensorboard", "tensorboard"),
+    ("plugins", "/api/plugins", "plugins"),
+    ("database", "/api/db", "database"),
+    ("tools", "/api/tools", "tools"),
+    ("settings", "/api", "settings"),
+]
+
+# Routers whose modules pull in torch/transformers at import time; they are
+# only imported once one of their endpoints is actually requested
+LAZY_ROUTER_SPECS = [
+    ("inference", "/api/inference"),
+    ("caption", "/api/caption"),
+]
+
+
+class LazyRouter:
+    """
+    ASGI app that imports a router module on its first request.
+
+    Mounted at the router's prefix and then dispatches straight to the
+    module's APIRouter, so errors still reach the app's exception handling.
+    Lazy routes don't appear in the OpenAPI schema.
+    """
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+        self._router = None
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if self._router is None:
+            async with self._lock:
+                if self._router is None:
+                    module = await asyncio.to_thread(
+                        importlib.import_module, f"web_ui.backend.api.{self.module_name}"
+                    )
+                    self._router = module.router
+        await self._router(scope, receive, send)
+
+
+for name, prefix, tag in ROUTER_SPECS:
+    try:
+        module = importlib.import_module(f"web_ui.backend.api.{name}")
+    except ImportError as e:
+        logger.warning("Could not import API router %s: %s", name, e)
+        continue
+    app.include_router(module.router, prefix=prefix, tags=[tag])
+
+for name, prefix in LAZY_ROUTER_SPECS:
+    app.mount(prefix, LazyRouter(name), name=f"{name}_api")
 
 
 # Static file serving for frontend (production)
+import hashlib
 import os
 from pathlib import Path
-from fastapi.responses import FileResponse
+from fastapi import Request
 
-frontend_dist = Path(__file__).parent.parent / "frontend" / "dist"
+# Resolved once so StaticFiles and the SPA route never re-walk symlinks or
+# re-stat the build directory per request
+frontend_dist = (Path(__file__).parent.parent / "frontend" / "dist").resolve()
 
 if frontend_dist.exists():
     # Serve static assets (js, css, images)
     app.mount(
         "/assets",
-        StaticFiles(directory=str(frontend_dist / "assets")),
+        PrecompressedStaticFiles(directory=os.path.join(frontend_dist, "assets")),
         name="assets"
     )
     
+    # index.html is fixed for a given build, so read it once and let
+    # browsers revalidate against its hash
+    try:
+        with open(os.path.join(frontend_dist, "index.html"), "rb") as f:
+            index_bytes = f.read()
+    except FileNotFoundError:
+        index_bytes = None
+    index_headers = {
+        "ETag": f'"{hashlib.md5(index_bytes or b"").hexdigest()}"',
+        "Cache-Control": "no-cache",
+    }
+
+    def index_response(request: Request) -> Response:
+        if index_bytes is None:
+            return JSONResponse({"error": "Frontend not built"}, status_code=404)
+        if request.headers.get("if-none-match") == index_headers["ETag"]:
+            return Response(status_code=304, headers=index_headers)
+        return Response(index_bytes, media_type="text/html", headers=index_headers)
+
+    # The frontend has no client-side router, so page loads hit these plain
+    # routes and never reach the catchall's path regex
+    @app.get("/", include_in_schema=False)
+    @app.get("/index.html", include_in_schema=False)
+    async def serve_index(request: Request):
+        return index_response(request)
+
     # Catchall route for SPA - must be AFTER API routes
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+    @app.get("/{full_path:path}", include_in_schema=False)
+    async def serve_spa(full_path: str, request: Request):
         # Serve index.html for all non-API routes (SPA routing)
-        index_path = frontend_dist / "index.html"
-        if index_path.exists():
-            return FileResponse(str(index_path))
-        return JSONResponse({"error": "Frontend not built"}, status_code=404)
+        return index_response(request)
 else:
-    print(f"Warning: Frontend dist not found at {frontend_dist}")
-    print("Run 'npm run build' in web_ui/frontend to build the frontend")
-
-
-@app.exception_handler(Exception)
-async def global_exception_handler(request, exc):
-    """Global exception handler."""
-    print(f"Error processing request: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={
-            "error": "Internal server error",
-            "detail": str(exc)
-        }
-    )
+    logger.warning("Frontend dist not found at %s", frontend_dist)
+    logger.warning("Run 'npm run build' in web_ui/frontend to build the frontend")
 
 
 if __name__ == "__main__":
     import uvicorn
+    from web_ui.run import server_options
 
     uvicorn.run(
         "web_ui.backend.main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        **server_options()
     )
@@ -0,0 +1,172 @@
+"""
+ASGI middleware for the OneTrainer Web UI backend.
+
+Written against the raw ASGI interface so they add no Request/Response
+allocation on the hot path.
+"""
+import json
+import logging
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorMiddleware:
+    """
+    Turn unhandled exceptions into a JSON 500 response.
+
+    The happy path only tracks whether the response has started; the error
+    body is built once an exception actually escapes the application.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            logger.exception("Error processing request")
+            if response_started:
+                # Too late for an error body; let the server drop the connection
+                raise
+
+            content = {"error": "Internal server error", "detail": str(exc)}
+            body = orjson.dumps(content) if orjson is not None else json.dumps(content).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+
+
+class FastCORS:
+    """
+    Minimal CORS middleware for a fixed set of origins.
+
+    All header values are encoded once at startup. Each allowed origin gets
+    its prebuilt header list, so a request only does a set lookup and a
+    list extend.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            allow_origins: Iterable[str],
+            allow_methods: Iterable[str] = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT"),
+            allow_headers: Iterable[str] = ("*",),
+            allow_credentials: bool = False,
+            max_age: int = 600,
+    ):
+        self.app = app
+        self._origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self._allow_methods = ", ".join(allow_methods).encode("latin-1")
+        allow_headers = list(allow_headers)
+        self._echo_headers = "*" in allow_headers
+        self._allow_headers = ", ".join(allow_headers).encode("latin-1")
+        self._max_age = str(max_age).encode("latin-1")
+
+        credentials = [(b"access-control-allow-credentials", b"true")] if allow_credentials else []
+        self._simple_headers = {
+            origin: [(b"access-control-allow-origin", origin), (b"vary", b"Origin"), *credentials]
+            for origin in self._origins
+        }
+        # With an explicit header list the whole preflight response is fixed
+        self._preflight_headers = {
+            origin: self._build_preflight_headers(headers, self._allow_headers)
+            for origin, headers in self._simple_headers.items()
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = self._simple_headers.get(origin)
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(send, cors_headers, request_headers)
+            return
+
+        if cors_headers is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _preflight(self, send: Send, cors_headers, request_headers) -> None:
+        """Answer a preflight request without touching the application."""
+        if cors_headers is None:
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        if self._echo_headers and request_headers is not None:
+            headers = self._build_preflight_headers(cors_headers, request_headers)
+        else:
+            headers = self._preflight_headers[cors_headers[0][1]]
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"OK"})
+
+    def _build_preflight_headers(self, cors_headers, allow_headers: bytes):
+        """Assemble the headers of a successful preflight response."""
+        return [
+            *cors_headers,
+            (b"access-control-allow-methods", self._allow_methods),
+            (b"access-control-allow-headers", allow_headers),
+            (b"access-control-max-age", self._max_age),
+            (b"content-length", b"2"),
+            (b"content-type", b"text/plain; charset=utf-8"),
+        ]
@@ -7,7 +7,6 @@ providing validation, serialization, and documentation for all API interactions.
 
 from typing import Optional, Any, Dict, List
 from pydantic import BaseModel, Field, ConfigDict
-from datetime import datetime
 
 
 # ============================================================================
@@ -117,7 +116,7 @@ class ConfigPresetInfo(BaseModel):
     name: str = Field(..., description="Preset name/identifier")
     path: str = Field(..., description="File path to the preset")
     description: Optional[str] = Field(None, description="Preset description if available")
-    last_modified: Optional[datetime] = Field(None, description="Last modification timestamp")
+    last_modified: Optional[int] = Field(None, description="Last modification time in ms since epoch")
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -125,7 +124,7 @@ class ConfigPresetInfo(BaseModel):
                 "name": "flux_lora_basic",
                 "path": "/configs/flux_lora_basic.json",
                 "description": "Basic LoRA training for Flux models",
-                "last_modified": "2024-12-24T10:30:00"
+                "last_modified": 1735036200000
             }
         }
     )
@@ -144,7 +143,7 @@ class ConfigPresetsResponse(BaseModel):
                         "name": "flux_lora_basic",
                         "path": "/configs/flux_lora_basic.json",
                         "description": "Basic LoRA training for Flux models",
-                        "last_modified": "2024-12-24T10:30:00"
+                        "last_modified": 1735036200000
                     }
                 ],
                 "count": 1
@@ -234,7 +233,7 @@ class SampleInfo(BaseModel):
     id: str = Field(..., description="Unique sample identifier")
     path: str = Field(..., description="File path to the sample image/video")
     filename: str = Field(..., description="Sample filename")
-    timestamp: datetime = Field(..., description="When the sample was generated")
+    timestamp: int = Field(..., description="When the sample was generated, in ms since epoch")
     epoch: Optional[int] = Field(None, description="Epoch when sample was generated")
     step: Optional[int] = Field(None, description="Step when sample was generated")
     prompt: Optional[str] = Field(None, description="Prompt used for generation")
@@ -246,7 +245,7 @@ class SampleInfo(BaseModel):
                 "id": "sample_1200_5_120",
                 "path": "/workspace/samples/sample_1200_5_120.png",
                 "filename": "sample_1200_5_120.png",
-                "timestamp": "2024-12-24T10:30:00",
+                "timestamp": 1735036200000,
                 "epoch": 5,
                 "step": 1200,
                 "prompt": "a beautiful landscape",
@@ -269,7 +268,7 @@ class SamplesListResponse(BaseModel):
                         "id": "sample_1200_5_120",
                         "path": "/workspace/samples/sample_1200_5_120.png",
                         "filename": "sample_1200_5_120.png",
-                        "timestamp": "2024-12-24T10:30:00",
+                        "timestamp": 1735036200000,
                         "epoch": 5,
                         "step": 1200
                     }
@@ -0,0 +1,27 @@
+"""
+Response classes for the OneTrainer Web UI backend.
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when it is installed.
+
+    Opted into per router (default_response_class) or per route
+    (response_class) for handlers that return plain dicts. It is deliberately
+    not the app-wide default, so routes with a response model keep FastAPI's
+    Pydantic fast path.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -1,9 +1,13 @@
 import os
+import functools
+import threading
 import torch
 import math
 import warnings
 from PIL import Image
 import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Generator, Optional, Tuple, List, Dict, Any
 from transformers import BitsAndBytesConfig, AutoProcessor, AutoModelForVision2Seq
 from qwen_vl_utils import process_vision_info
@@ -20,6 +24,24 @@ try:
 except ImportError:
     Qwen2VLForConditionalGeneration = None
 
+
+@functools.lru_cache(maxsize=4096)
+def smart_resize(height: int, width: int, factor: int, min_pixels: int, max_pixels: int) -> Tuple[int, int]:
+    """Scales (height, width) into the pixel budget, snapped to multiples of factor."""
+    current_pixels = height * width
+    if min_pixels <= current_pixels <= max_pixels:
+        return height, width
+    target_pixels = max_pixels
+    scale_factor = math.sqrt(target_pixels / current_pixels)
+    new_height = int(height * scale_factor)
+    new_width = int(width * scale_factor)
+    new_height = (new_height // factor) * factor
+    new_width = (new_width // factor) * factor
+    if new_height < factor: new_height = factor
+    if new_width < factor: new_width = factor
+    return new_height, new_width
+
+
 class CaptionService:
     _instance = None
 
@@ -29,11 +51,18 @@ class CaptionService:
         self.current_model_id = None
         self.current_quant = None
         self.should_abort = False
+        # (media type, prompt) -> chat template text; only valid for the loaded processor
+        self._template_cache: Dict[Tuple[str, str], str] = {}
+        # Fast tokenizers reject concurrent calls; guards the processor while
+        # the next batch is preprocessed alongside generate
+        self._processor_lock = threading.Lock()
         
         # Defaults
         self.default_model_id = "Qwen/Qwen2.5-VL-7B-Instruct" 
         self.image_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
         self.video_extensions = ('.mp4', '.mov', '.avi', '.webm', '.mkv', ".gif", ".flv")
+        # Dotless, for matching against name.rpartition(".")[2] while scanning
+        self._media_suffixes = frozenset(ext[1:] for ext in self.image_extensions + self.video_extensions)
 
     @classmethod
     def get_instance(cls):
@@ -75,6 +104,7 @@ class CaptionService:
         if self.processor is not None:
             del self.processor
             self.processor = None
+        self._template_cache.clear()
             
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
@@ -107,10 +137,13 @@ class CaptionService:
         if quantization == "8-bit":
             kwargs["quantization_config"] = BitsAndBytesConfig(load_in_8bit=True)
         elif quantization == "4-bit":
+            # Dequantize NF4 weights to the model dtype rather than FP32, which
+            # doubles memory traffic and skips the tensor cores
             kwargs["quantization_config"] = BitsAndBytesConfig(
-                load_in_4bit=True, 
-                bnb_4bit_compute_dtype=torch.float32,
-                bnb_4bit_quant_type="nf4"
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=default_dtype,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True
             )
         
         # Load Model
@@ -130,141 +163,261 @@ class CaptionService:
             traceback.print_exc()
             print(f"[CaptionService] Primary load failed: {e}")
 
-            # Fallback to eager attention if FA2 fails
+            # Fallback to PyTorch SDPA if FA2 fails; it still dispatches to fused
+            # flash/memory-efficient kernels instead of materializing the full
+            # attention matrix like eager does
             if attn_impl == "flash_attention_2":
-                print(f"[CaptionService] FA2 failed ({e}), falling back to eager attention.")
-                kwargs["attn_implementation"] = "eager"
+                print(f"[CaptionService] FA2 failed ({e}), falling back to sdpa attention.")
+                kwargs["attn_implementation"] = "sdpa"
                 self.model = model_cls.from_pretrained(model_id, **kwargs)
             else:
                 raise e
 
+        # Inference only: disables dropout and other training-time behaviour
+        self.model.eval()
+
         # Load Processor
         self.processor = AutoProcessor.from_pretrained(model_id, trust_remote_code=True)
+        self._template_cache.clear()
+        # Batched generation needs prompts right-aligned so new tokens follow directly
+        self.processor.tokenizer.padding_side = "left"
         
         self.current_model_id = model_id
         self.current_quant = quantization
+
+        self._warmup()
         
         return self.get_state()
 
+    def _warmup(self):
+        """
+        Runs a tiny caption so CUDA context setup, kernel selection and lazy
+        initialization happen during load instead of on the first real file.
+        """
+        print("[CaptionService] Warming up model...")
+        try:
+            messages = [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "image", "image": Image.new("RGB", (56, 56)), "resized_height": 56, "resized_width": 56},
+                        {"type": "text", "text": "Describe this image."},
+                    ],
+                }
+            ]
+            image_inputs, video_inputs = process_vision_info([messages])
+            with self._processor_lock:
+                inputs = self.processor(
+                    text=[self._chat_text(messages)],
+                    images=image_inputs,
+                    videos=video_inputs,
+                    padding=True,
+                    return_tensors="pt",
+                )
+            self._generate_from_inputs(inputs, 4)
+        except Exception as e:
+            # Warmup is only an optimization; the model itself loaded fine
+            print(f"[CaptionService] Warmup failed: {e}")
+
             
     def generate_caption(self, media_path: str, prompt: str, max_tokens: int = 256, resolution_mode: str = "auto") -> str:
+        return self.generate_captions_batch([media_path], prompt, max_tokens, resolution_mode)[0]
+
+    def _resolution_limits(self, resolution_mode: str) -> Tuple[int, int]:
+        """Returns (min_pixels, max_pixels) for a resolution mode."""
+        if resolution_mode == "auto":
+            return 3136, 1003520
+        elif resolution_mode == "fast":
+            return 3136, 501760
+        else:  # auto_high / high
+            return 3136, 2007040
+
+    def _build_messages(self, media_path: str, prompt: str, min_pixels: int, max_pixels: int) -> List[Dict[str, Any]]:
+        """Builds the chat messages for a single image or video."""
+        if media_path.lower().endswith(self.video_extensions):
+            # Video handling - pass path directly to qwen_vl_utils
+            print(f"[DEBUG] Processing video: {media_path}")
+            return [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "video",
+                            "video": media_path,
+                            "max_pixels": max_pixels,
+                            "fps": 1.0,  # Sample 1 frame per second
+                        },
+                        {"type": "text", "text": prompt},
+                    ],
+                }
+            ]
+
+        # Image handling
+        image = Image.open(media_path)
+        width, height = image.size
+        resized_height, resized_width = smart_resize(height, width, 28, min_pixels, max_pixels)
+
+        if (resized_width, resized_height) != (width, height):
+            # Let libjpeg downscale in the DCT domain while decoding, keeping
+            # 2x headroom for the final resize below
+            if image.format == "JPEG":
+                image.draft("RGB", (resized_width * 2, resized_height * 2))
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            # Hand the processor an image that is already at its target size
+            image = image.resize((resized_width, resized_height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "image": image,
+                        "resized_height": resized_height,
+                        "resized_width": resized_width,
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        ]
+
+    def _chat_text(self, messages: List[Dict[str, Any]]) -> str:
+        """
+        Returns the chat template text for single-media messages.
+
+        The template only emits a placeholder for the image or video (the
+        processor expands it later), so the text depends on the media type
+        and prompt alone and is rendered once per combination.
+        """
+        media, text = messages[0]["content"]
+        key = (media["type"], text["text"])
+        chat_text = self._template_cache.get(key)
+        if chat_text is None:
+            chat_text = self.processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            self._template_cache[key] = chat_text
+        return chat_text
+
+    def generate_captions_batch(
+        self,
+        media_paths: List[str],
+        prompt: str,
+        max_tokens: int = 256,
+        resolution_mode: str = "auto"
+    ) -> List[str]:
+        """Captions several files with a single model.generate call, in input order."""
         if not self.model or not self.processor:
             raise RuntimeError("Model needed")
-        
-        print(f"[DEBUG] Generating caption for {media_path}...")
-        
-        is_video = media_path.lower().endswith(self.video_extensions)
-        
+
         try:
-            # Helper function for smart_resize
-            def smart_resize(height, width, factor, min_pixels, max_pixels):
-                current_pixels = height * width
-                if min_pixels <= current_pixels <= max_pixels:
-                    return height, width
-                target_pixels = max_pixels
-                scale_factor = math.sqrt(target_pixels / current_pixels)
-                new_height = int(height * scale_factor)
-                new_width = int(width * scale_factor)
-                new_height = (new_height // factor) * factor
-                new_width = (new_width // factor) * factor
-                if new_height < factor: new_height = factor
-                if new_width < factor: new_width = factor
-                return new_height, new_width
-
-            # Resolution settings
-            if resolution_mode == "auto":
-                min_pixels = 3136
-                max_pixels = 1003520
-            elif resolution_mode == "fast":
-                min_pixels = 3136 
-                max_pixels = 501760 
-            else:  # auto_high / high
-                min_pixels = 3136 
-                max_pixels = 2007040
-
-            if is_video:
-                # Video handling - pass path directly to qwen_vl_utils
-                print(f"[DEBUG] Processing video: {media_path}")
-                messages = [
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "video",
-                                "video": media_path,
-                                "max_pixels": max_pixels,
-                                "fps": 1.0,  # Sample 1 frame per second
-                            },
-                            {"type": "text", "text": prompt},
-                        ],
-                    }
-                ]
-            else:
-                # Image handling
-                image = Image.open(media_path)
-                if image.mode != "RGB":
-                    image = image.convert("RGB")
-                
-                width, height = image.size
-                resized_height, resized_width = smart_resize(height, width, factor=28, min_pixels=min_pixels, max_pixels=max_pixels)
-                
-                messages = [
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "image": image,
-                                "resized_height": resized_height,
-                                "resized_width": resized_width,
-                            },
-                            {"type": "text", "text": prompt},
-                        ],
-                    }
-                ]
-            
-            print(f"[DEBUG] Processing vision info for {media_path}...")
-            text = self.processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-            image_inputs, video_inputs = process_vision_info(messages)
-            
-            print(f"[DEBUG] Moving inputs to device {self.model.device}...")
+            inputs = self._preprocess_batch(media_paths, prompt, resolution_mode)
+            return self._generate_from_inputs(inputs, max_tokens)
+        except Exception as e:
+            print(f"[ERROR] Generate failed: {e}")
+            traceback.print_exc()
+            raise e
+
+    def _preprocess_batch(self, media_paths: List[str], prompt: str, resolution_mode: str):
+        """
+        Decodes the media and builds processor inputs on the CPU.
+
+        Runs on the prefetch thread in process_folder, so it must not touch the GPU.
+        """
+        print(f"[DEBUG] Preprocessing {len(media_paths)} file(s)...")
+        min_pixels, max_pixels = self._resolution_limits(resolution_mode)
+        messages_list = [
+            self._build_messages(media_path, prompt, min_pixels, max_pixels)
+            for media_path in media_paths
+        ]
+        image_inputs, video_inputs = process_vision_info(messages_list)
+
+        with self._processor_lock:
+            texts = [self._chat_text(messages) for messages in messages_list]
             inputs = self.processor(
-                text=[text],
+                text=texts,
                 images=image_inputs,
                 videos=video_inputs,
                 padding=True,
                 return_tensors="pt",
             )
-            inputs = inputs.to(self.model.device)
 
-            # Ensure inputs match model dtype (critical for FP16/BF16 inference)
-            if hasattr(self.model, "dtype"):
-                for k, v in inputs.items():
-                    if isinstance(v, torch.Tensor) and v.dtype.is_floating_point:
-                        inputs[k] = v.to(dtype=self.model.dtype)
+        # Page-locked buffers let the host-to-device copy run asynchronously
+        if torch.cuda.is_available():
+            for k, v in inputs.items():
+                if isinstance(v, torch.Tensor):
+                    inputs[k] = v.pin_memory()
+        return inputs
 
-            print(f"[DEBUG] Running model.generate...")
+    def _generate_from_inputs(self, inputs, max_tokens: int) -> List[str]:
+        """Moves preprocessed inputs to the model device and decodes captions."""
+        print(f"[DEBUG] Moving inputs to device {self.model.device}...")
+        # Floating inputs must match the model dtype (critical for FP16/BF16
+        # inference); casting during the copy avoids a second device allocation
+        target_dtype = getattr(self.model, "dtype", None)
+        for k, v in inputs.items():
+            if not isinstance(v, torch.Tensor):
+                continue
+            if target_dtype is not None and v.dtype.is_floating_point:
+                inputs[k] = v.to(device=self.model.device, dtype=target_dtype, non_blocking=True)
+            else:
+                inputs[k] = v.to(self.model.device, non_blocking=True)
+
+        print(f"[DEBUG] Running model.generate...")
+        # inference_mode skips autograd tracking and version counters on
+        # every activation; greedy decoding reuses the KV cache each step
+        with torch.inference_mode():
             generated_ids = self.model.generate(
-                **inputs, 
+                **inputs,
                 max_new_tokens=max_tokens,
-                pad_token_id=self.processor.tokenizer.eos_token_id
+                pad_token_id=self.processor.tokenizer.eos_token_id,
+                use_cache=True,
+                do_sample=False,
+                num_beams=1,
             )
-            
-            print(f"[DEBUG] Decoding output...")
-            generated_ids_trimmed = [
-                out_ids[len(in_ids) :] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
-            ]
-            caption = self.processor.batch_decode(
+
+        # Prompts are left-padded to a common length, so every row's
+        # generated tokens start at the same offset
+        generated_ids_trimmed = generated_ids[:, inputs["input_ids"].shape[1]:]
+        with self._processor_lock:
+            captions = self.processor.batch_decode(
                 generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
-            )[0]
-            
-            print(f"[DEBUG] Generated: {caption[:50]}...")
-            return caption
+            )
+
+        print(f"[DEBUG] Generated: {captions[0][:50]}...")
+        return captions
+
+    def _caption_pending(
+        self,
+        media_paths: List[str],
+        prompt: str,
+        max_tokens: int,
+        resolution_mode: str,
+        inputs_future: Optional[Future] = None
+    ) -> List[Any]:
+        """
+        Captions a batch, returning a caption or the exception per file.
 
+        inputs_future, if given, holds the batch's prefetched _preprocess_batch
+        result. If the batch as a whole fails, files are retried one by one so
+        a single unreadable file doesn't fail its neighbours.
+        """
+        try:
+            if inputs_future is None:
+                return self.generate_captions_batch(media_paths, prompt, max_tokens, resolution_mode)
+            return self._generate_from_inputs(inputs_future.result(), max_tokens)
         except Exception as e:
-            print(f"[ERROR] Generate failed: {e}")
-            traceback.print_exc()
-            raise e
+            if len(media_paths) == 1:
+                return [e]
+
+        results = []
+        for media_path in media_paths:
+            try:
+                results.append(self.generate_caption(media_path, prompt, max_tokens, resolution_mode))
+            except Exception as e:
+                results.append(e)
+        return results
 
     def run_batch_job(self, data: dict) -> Generator[Dict[str, Any], None, None]:
         folder_path = data.get('folder_path')
@@ -275,14 +428,14 @@ class CaptionService:
 
         print(f"[DEBUG] Starting batch job in {folder_path}")
 
-        # Filter out hidden files and hidden directories (if we were recursive)
-        # Using listdir so just checking filename
-        files = [
-            f for f in os.listdir(folder_path) 
-            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.bmp')) 
-            and not f.startswith('.')
-        ]
-        files.sort()
+        existing_captions = set()
+        files = sorted(
+            os.path.basename(path)
+            for path in self._scan_media(
+                folder_path, frozenset(("png", "jpg", "jpeg", "webp", "bmp")), recursive=False,
+                captions=existing_captions
+            )
+        )
         
         total = len(files)
         processed = 0
@@ -307,7 +460,7 @@ class CaptionService:
                 "failed": failed
             }
 
-            if skip_existing and os.path.exists(txt_path):
+            if skip_existing and txt_path in existing_captions:
                 skipped += 1
                 continue
                 
@@ -332,85 +485,172 @@ class CaptionService:
         }
         print("[DEBUG] Batch job finished")
 
+    def _scan_media(
+        self,
+        folder_path: str,
+        suffixes: frozenset,
+        recursive: bool = True,
+        captions: Optional[set] = None
+    ) -> Generator[str, None, None]:
+        """
+        Yields paths of non-hidden files whose dotless extension is in suffixes.
+
+        If captions is given, the paths of .txt files seen along the way are
+        added to it, so skip_existing checks need no per-file syscall.
+
+        Uses os.scandir, whose entries carry the file type, so no per-file stat
+        is needed. Directories are walked with an explicit stack, files of a
+        directory before its subdirectories; unreadable ones are skipped like
+        os.walk does.
+        """
+        stack = [folder_path]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            subdirs = []
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith("."):
+                        continue
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if recursive:
+                            subdirs.append(entry.path)
+                    elif "." in name and name.rpartition(".")[2].lower() in suffixes:
+                        yield entry.path
+                    elif captions is not None and name.endswith(".txt"):
+                        captions.add(entry.path)
+            stack.extend(reversed(subdirs))
+
     def process_folder(
         self,
         folder_path: str,
         prompt: str,
         skip_existing: bool,
         max_tokens: int,
-        resolution_mode: str
+        resolution_mode: str,
+        batch_size: int = 4
     ) -> Generator[Dict[str, Any], None, None]:
-        """Yields progress updates while processing a folder."""
+        """
+        Yields progress updates while processing a folder, captioning batch_size files per generate call.
+
+        The next batch is decoded and preprocessed on a worker thread while the
+        current one runs on the GPU.
+        """
         self.should_abort = False
         
-        media_files = []
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                ext = os.path.splitext(file)[-1].lower()
-                if ext in self.image_extensions or ext in self.video_extensions:
-                    media_files.append(os.path.join(root, file))
+        # Caption files that already existed before this run, found in the same scan
+        existing_captions = set()
+        media_files = list(self._scan_media(folder_path, self._media_suffixes, captions=existing_captions))
                     
         total = len(media_files)
         if total == 0:
             yield {"type": "error", "message": "No media found"}
             return
 
-        skipped = 0
-        failed = 0
-        processed = 0
-        
-        for idx, media_path in enumerate(media_files):
-            if self.should_abort:
-                yield {"type": "aborted", "processed": processed, "total": total}
-                return
+        stats = {"processed": 0, "skipped": 0, "failed": 0}
+        batch_size = max(1, batch_size)
+        # (media path, relative path, caption path) awaiting a batch
+        pending = []
+        # (batch items, preprocessing future) submitted to the prefetch thread
+        in_flight = deque()
 
-            rel_path = os.path.relpath(media_path, folder_path)
-            txt_path = os.path.splitext(media_path)[0] + ".txt"
-            
-            if skip_existing and os.path.exists(txt_path):
-                skipped += 1
-                yield {
-                    "type": "skipped",
-                    "filename": rel_path,
-                    "progress": (idx + 1) / total,
-                    "total": total,
-                    "stats": {"processed": processed, "skipped": skipped, "failed": failed}
-                }
-                continue
-                
-            try:
-                # Note: The generate_caption method was replaced above.
-                # This call will now use the new image-only generate_caption.
-                # If video files are present, they will likely cause an error
-                # because the new generate_caption expects an image file.
-                caption = self.generate_caption(media_path, prompt, max_tokens, resolution_mode)
-                
-                with open(txt_path, "w", encoding="utf-8") as f:
-                    f.write(caption)
-                    
-                processed += 1
+        def progress():
+            # Skipped files are reported as soon as they are reached while
+            # batched ones finish later, so count completions instead of
+            # using the file's position
+            return (stats["processed"] + stats["skipped"] + stats["failed"]) / total
+
+        def submit_pending():
+            items = list(pending)
+            pending.clear()
+            future = executor.submit(
+                self._preprocess_batch, [media_path for media_path, _, _ in items], prompt, resolution_mode
+            )
+            in_flight.append((items, future))
+
+        def run_next():
+            items, future = in_flight.popleft()
+            results = self._caption_pending(
+                [media_path for media_path, _, _ in items], prompt, max_tokens, resolution_mode, future
+            )
+            for (media_path, rel_path, txt_path), result in zip(items, results):
+                if not isinstance(result, Exception):
+                    try:
+                        with open(txt_path, "w", encoding="utf-8") as f:
+                            f.write(result)
+                    except Exception as e:
+                        result = e
+
+                if isinstance(result, Exception):
+                    stats["failed"] += 1
+                    print(f"[CaptionService] Error processing {rel_path}: {result}")
+                    yield {
+                        "type": "error_file",
+                        "filename": rel_path,
+                        "error": str(result),
+                        "progress": progress(),
+                        "total": total,
+                        "stats": dict(stats)
+                    }
+                    continue
+
+                stats["processed"] += 1
                 yield {
                     "type": "success",
                     "filename": rel_path,
-                    "caption": caption,
-                    "progress": (idx + 1) / total,
+                    "caption": result,
+                    "progress": progress(),
                     "total": total,
-                    "stats": {"processed": processed, "skipped": skipped, "failed": failed}
-                }
-                
-            except Exception as e:
-                failed += 1
-                print(f"[CaptionService] Error processing {rel_path}: {e}")
-                yield {
-                    "type": "error_file",
-                    "filename": rel_path,
-                    "error": str(e),
-                    "progress": (idx + 1) / total,
-                    "total": total,
-                    "stats": {"processed": processed, "skipped": skipped, "failed": failed}
+                    "stats": dict(stats)
                 }
 
-        yield {"type": "complete", "stats": {"processed": processed, "skipped": skipped, "failed": failed}}
+        # One worker is enough to keep a single batch ready ahead of the GPU
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="caption-prefetch") as executor:
+            for media_path in media_files:
+                if self.should_abort:
+                    break
+
+                rel_path = os.path.relpath(media_path, folder_path)
+                txt_path = os.path.splitext(media_path)[0] + ".txt"
+
+                if skip_existing and txt_path in existing_captions:
+                    stats["skipped"] += 1
+                    yield {
+                        "type": "skipped",
+                        "filename": rel_path,
+                        "progress": progress(),
+                        "total": total,
+                        "stats": dict(stats)
+                    }
+                    continue
+
+                pending.append((media_path, rel_path, txt_path))
+                if len(pending) >= batch_size:
+                    submit_pending()
+                    # Caption the previous batch while this one is preprocessed
+                    if len(in_flight) > 1:
+                        yield from run_next()
+
+            if pending and not self.should_abort:
+                submit_pending()
+            while in_flight and not self.should_abort:
+                yield from run_next()
+            # Drop prefetched batches left behind by an abort
+            for _, future in in_flight:
+                future.cancel()
+
+        if self.should_abort:
+            yield {"type": "aborted", "processed": stats["processed"], "total": total}
+            return
+
+        yield {"type": "complete", "stats": dict(stats)}
 
     def stop_processing(self):
         self.should_abort = True
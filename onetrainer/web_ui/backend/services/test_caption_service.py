@@ -0,0 +1,83 @@
+"""
+Tests for the caption service batch processing.
+
+Run with: pytest web_ui/backend/services/test_caption_service.py
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("qwen_vl_utils")
+
+from .caption_service import CaptionService
+
+
+def fake_preprocess(media_paths, prompt, resolution_mode):
+    # Paths must open regardless of the working directory
+    for path in media_paths:
+        assert os.path.isabs(path) and os.path.isfile(path), path
+    return list(media_paths)
+
+
+@pytest.fixture
+def service():
+    """CaptionService whose preprocessing and generation are faked per file."""
+    service = CaptionService()
+    service._preprocess_batch = fake_preprocess
+    service._generate_from_inputs = lambda inputs, max_tokens: [
+        f"caption of {os.path.basename(path)}" for path in inputs
+    ]
+    return service
+
+
+def make_folder(folder, count, captioned):
+    for i in range(count):
+        (folder / f"{i}.png").write_bytes(b"")
+        if i in captioned:
+            (folder / f"{i}.txt").write_text("existing", encoding="utf-8")
+
+
+def test_progress_is_monotonic_with_skips(service, tmp_path):
+    """Files waiting in a batch must not report progress behind skipped ones."""
+    make_folder(tmp_path, 10, captioned={2, 3, 4, 5, 6, 7, 9})
+
+    updates = list(service.process_folder(str(tmp_path), "prompt", True, 16, "auto", batch_size=4))
+
+    progress = [update["progress"] for update in updates if "progress" in update]
+    assert len(progress) == 10
+    assert progress == sorted(progress)
+    assert progress[-1] == 1.0
+    assert updates[-1] == {"type": "complete", "stats": {"processed": 3, "skipped": 7, "failed": 0}}
+
+
+def test_batches_write_captions(service, tmp_path):
+    make_folder(tmp_path, 6, captioned={1})
+
+    updates = list(service.process_folder(str(tmp_path), "prompt", True, 16, "auto", batch_size=2))
+
+    types = sorted(update["type"] for update in updates)
+    assert types == ["complete", "skipped", "success", "success", "success", "success", "success"]
+    for i in (0, 2, 3, 4, 5):
+        assert (tmp_path / f"{i}.txt").read_text(encoding="utf-8") == f"caption of {i}.png"
+    assert (tmp_path / "1.txt").read_text(encoding="utf-8") == "existing"
+
+
+def test_failed_batch_falls_back_per_file(service, tmp_path):
+    make_folder(tmp_path, 4, captioned=set())
+
+    def preprocess(media_paths, prompt, resolution_mode):
+        if any(path.endswith("2.png") for path in media_paths):
+            raise ValueError("unreadable")
+        return fake_preprocess(media_paths, prompt, resolution_mode)
+
+    service._preprocess_batch = preprocess
+    service.model = service.processor = object()
+
+    updates = list(service.process_folder(str(tmp_path), "prompt", False, 16, "auto", batch_size=4))
+
+    failed = [update["filename"] for update in updates if update["type"] == "error_file"]
+    assert failed == ["2.png"]
+    assert updates[-1]["stats"] == {"processed": 3, "skipped": 0, "failed": 1}
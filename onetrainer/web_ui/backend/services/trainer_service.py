@@ -7,10 +7,16 @@ import time
 import sys
 import io
 from pathlib import Path
-from typing import Optional, Dict, Any
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping
 from dataclasses import dataclass, asdict
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class StdoutCapture(io.StringIO):
     """Captures stdout and forwards to a callback while still printing."""
@@ -78,6 +84,102 @@ from modules.util.TrainProgress import TrainProgress
 from modules.modelSampler.BaseModelSampler import ModelSamplerOutput
 
 
+# Pending messages kept per WebSocket client before the oldest are dropped
+WS_QUEUE_SIZE = 64
+# Clients handled per broadcast step before yielding back to the event loop
+BROADCAST_BATCH_SIZE = 50
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """
+    Serialize a WebSocket message once for all clients.
+
+    Uses orjson when available. The result stays a str so it goes out as a
+    text frame, which the frontend parses with JSON.parse.
+    """
+    if orjson is not None:
+        return orjson.dumps(message, default=_json_default).decode()
+    return json.dumps(message, default=_json_default)
+
+
+def _json_default(obj):
+    """Let encode_message serialize read-only state snapshots."""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class InProcessBroadcaster:
+    """
+    Fans encoded messages out to the WebSockets connected to this process.
+
+    Each client gets a bounded queue drained by its own relay task, so a slow
+    client only ever delays itself. TrainerService only talks to this
+    interface (register/unregister/send_to/publish), keeping the fan-out
+    replaceable without touching the training callbacks.
+    """
+
+    def __init__(self):
+        # WebSocket -> (outgoing message queue, relay task draining it)
+        self._connections: Dict[Any, tuple[asyncio.Queue, asyncio.Task]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, websocket):
+        """Start relaying to a client; must be called from the event loop."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+        relay = asyncio.get_running_loop().create_task(self._relay(websocket, queue))
+        with self._lock:
+            self._connections[websocket] = (queue, relay)
+
+    def unregister(self, websocket):
+        """Stop relaying to a client."""
+        with self._lock:
+            entry = self._connections.pop(websocket, None)
+        if entry is not None:
+            entry[1].cancel()
+
+    def send_to(self, websocket, payload: str):
+        """Queue a payload for a single client."""
+        with self._lock:
+            entry = self._connections.get(websocket)
+        if entry is not None:
+            self._enqueue(entry[0], payload)
+
+    async def publish(self, payload: str):
+        """Queue a payload for every client."""
+        with self._lock:
+            queues = [queue for queue, _ in self._connections.values()]
+
+        for start in range(0, len(queues), BROADCAST_BATCH_SIZE):
+            if start:
+                # Let accepts and HTTP handlers run between batches
+                await asyncio.sleep(0)
+            for queue in queues[start:start + BROADCAST_BATCH_SIZE]:
+                self._enqueue(queue, payload)
+
+    async def _relay(self, websocket, queue: asyncio.Queue):
+        """Forward queued messages to a single client until it goes away."""
+        try:
+            while True:
+                message = await queue.get()
+                await websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Dead connection; drop it without cancelling ourselves
+            with self._lock:
+                self._connections.pop(websocket, None)
+
+    @staticmethod
+    def _enqueue(queue: asyncio.Queue, payload: str):
+        """Queue a payload, dropping the oldest pending update if the client is behind."""
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            queue.get_nowait()
+            queue.put_nowait(payload)
+
+
 @dataclass
 class TrainingState:
     """Current training state."""
@@ -120,10 +222,15 @@ class TrainerService:
         self._training_thread: Optional[threading.Thread] = None
         self._state = TrainingState()
         self._state_lock = threading.Lock()
+        # Read-only copy of the state, replaced (never mutated) on each update
+        # so readers need neither the lock nor a copy
+        self._state_snapshot: Mapping[str, Any] = MappingProxyType(asdict(self._state))
+        # /health body, rebuilt on every state change so the endpoint is a
+        # plain attribute read with no lock or dict copy
+        self.health_json: bytes = self._build_health_json()
 
-        # WebSocket connections for broadcasting updates
-        self._ws_connections: set = set()
-        self._ws_lock = threading.Lock()
+        # Fan-out to connected WebSocket clients
+        self._broadcaster = InProcessBroadcaster()
 
         # Event loop reference for async broadcasting from threads
         self._event_loop: Optional[asyncio.AbstractEventLoop] = None
@@ -146,28 +253,21 @@ class TrainerService:
         self._event_loop = loop
 
     def register_websocket(self, websocket):
-        """Register a WebSocket connection for updates."""
-        with self._ws_lock:
-            self._ws_connections.add(websocket)
+        """Register a WebSocket connection for updates (call from the event loop)."""
+        self._broadcaster.register(websocket)
 
     def unregister_websocket(self, websocket):
         """Unregister a WebSocket connection."""
-        with self._ws_lock:
-            self._ws_connections.discard(websocket)
+        self._broadcaster.unregister(websocket)
+
+    def send_to(self, websocket, payload: str):
+        """Queue an already encoded message for a single registered client."""
+        self._broadcaster.send_to(websocket, payload)
 
     async def broadcast_update(self, message: Dict[str, Any]):
         """Broadcast update to all connected WebSocket clients."""
-        with self._ws_lock:
-            connections = list(self._ws_connections)
-
-        # Send to all connections
-        for ws in connections:
-            try:
-                await ws.send_json(message)
-            except Exception:
-                # Remove dead connections
-                with self._ws_lock:
-                    self._ws_connections.discard(ws)
+        # Serialize once; every client shares the same string
+        await self._broadcaster.publish(encode_message(message))
 
     def _update_state(self, **kwargs):
         """Thread-safe state update with WebSocket broadcast."""
@@ -178,6 +278,8 @@ class TrainerService:
 
             # Prepare broadcast message
             state_dict = asdict(self._state)
+            self._state_snapshot = MappingProxyType(state_dict)
+            self.health_json = self._build_health_json()
 
         # Broadcast update asynchronously (don't block training thread)
         self._schedule_broadcast({
@@ -185,6 +287,14 @@ class TrainerService:
             "data": state_dict
         })
 
+    def _build_health_json(self) -> bytes:
+        """Encode the /health response for the current state."""
+        return encode_message({
+            "status": "healthy",
+            "training_active": self._state.is_training,
+            "trainer_status": self._state.status,
+        }).encode()
+
     def _schedule_broadcast(self, message: Dict[str, Any]):
         """Schedule a broadcast to run on the event loop from any thread."""
         if self._event_loop is None:
@@ -656,15 +766,14 @@ class TrainerService:
         self._commands.save()
         return True
 
-    def get_state(self) -> Dict[str, Any]:
+    def get_state(self) -> Mapping[str, Any]:
         """
         Get current training state.
 
         Returns:
-            Dictionary with current state
+            Read-only mapping with the current state
         """
-        with self._state_lock:
-            return asdict(self._state)
+        return self._state_snapshot
 
     def get_config(self) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,138 @@
+"""
+Static file serving for the built frontend.
+
+Vite output is immutable for a given deployment, so compressed variants of
+each asset are produced once at startup and picked per request from an
+in-memory table instead of compressing on the fly.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Extensions worth compressing; images and fonts are already compressed
+COMPRESSIBLE_SUFFIXES = frozenset({".js", ".mjs", ".css", ".html", ".json", ".svg", ".map", ".txt", ".wasm"})
+# Files smaller than this gain nothing from compression
+PRECOMPRESS_MIN_SIZE = 1024
+# Vite content-hashes bundle names (index-BXk3aB_c.js), so they never change
+HASHED_ASSET_RE = re.compile(r"-[A-Za-z0-9_-]{8,}\.(?:js|mjs|css|woff2?|ttf|png|jpe?g|gif|svg|webp|avif|wasm)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def precompress_directory(directory: Path) -> Dict[str, Dict[str, Tuple[str, os.stat_result]]]:
+    """
+    Write .br/.gz siblings for compressible files that lack a fresh one.
+
+    Returns a map of original path -> {content-encoding: (variant path, stat)}.
+    """
+    variants: Dict[str, Dict[str, Tuple[str, os.stat_result]]] = {}
+
+    encoders = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.insert(0, ("br", ".br", lambda data: brotli.compress(data, quality=11)))
+
+    # Keys must match StaticFiles.lookup_path, which resolves symlinks
+    for root, _, files in os.walk(os.path.realpath(directory)):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE_SUFFIXES:
+                continue
+            source_stat = os.stat(path)
+            if source_stat.st_size < PRECOMPRESS_MIN_SIZE:
+                continue
+
+            data = None
+            for encoding, suffix, compress in encoders:
+                variant = path + suffix
+                try:
+                    variant_stat = os.stat(variant)
+                    stale = variant_stat.st_mtime < source_stat.st_mtime
+                except FileNotFoundError:
+                    stale = True
+
+                if stale:
+                    if data is None:
+                        with open(path, "rb") as f:
+                            data = f.read()
+                    try:
+                        with open(variant, "wb") as f:
+                            f.write(compress(data))
+                    except OSError:
+                        # Read-only install; fall back to on-the-fly compression
+                        continue
+                    variant_stat = os.stat(variant)
+
+                if variant_stat.st_size < source_stat.st_size:
+                    variants.setdefault(path, {})[encoding] = (variant, variant_stat)
+
+    return variants
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves .br/.gz siblings when the client accepts them.
+
+    Content-hashed files are marked immutable so browsers stop revalidating them.
+    """
+
+    def __init__(self, *, directory: os.PathLike, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self._variants = precompress_directory(Path(directory))
+
+    def file_response(
+            self,
+            full_path: os.PathLike,
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200,
+    ) -> Response:
+        response = self._file_response(full_path, stat_result, scope, status_code)
+        if HASHED_ASSET_RE.search(os.fspath(full_path)):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    def _file_response(
+            self,
+            full_path: os.PathLike,
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int,
+    ) -> Response:
+        variants = self._variants.get(os.fspath(full_path))
+        if not variants:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        accepted = request_headers.get("accept-encoding", "")
+        for encoding, (variant_path, variant_stat) in variants.items():
+            if encoding in accepted:
+                break
+        else:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers["vary"] = "Accept-Encoding"
+            return response
+
+        media_type = mimetypes.guess_type(os.fspath(full_path))[0] or "text/plain"
+        response = FileResponse(
+            variant_path,
+            status_code=status_code,
+            stat_result=variant_stat,
+            media_type=media_type,
+            headers={"content-encoding": encoding, "vary": "Accept-Encoding"},
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -15,7 +15,7 @@ export function CaptionerTool() {
         model_id: "Qwen/Qwen2-VL-7B-Instruct",
         custom_model_id: "",
         quantization: "None",
-        attn_impl: "eager",
+        attn_impl: "sdpa",
         folder_path: "",
         base_prompt: "Give one detailed paragraph (max 250 words) describing everything clearly visible in the image—subjects, objects, environment, style, lighting, and mood. Do not use openings like 'This is' or 'The image shows'; start directly with the main subject. Avoid guessing anything not clearly visible.",
         max_tokens: 256,
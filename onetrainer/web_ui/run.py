@@ -10,6 +10,7 @@ Usage:
     python -m web_ui.run --dev    # Development mode (auto-reload on file changes)
 """
 import sys
+import copy
 import argparse
 from pathlib import Path
 
@@ -19,6 +20,38 @@ root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
 import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+
+def log_config() -> dict:
+    """Uvicorn's logging config, extended so web_ui loggers share its handler."""
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config["loggers"]["web_ui"] = {"handlers": ["default"], "level": "INFO", "propagate": False}
+    return config
+
+
+def server_options() -> dict:
+    """Uvicorn options shared by both entry points, using the fastest event loop and HTTP parser available."""
+    # RFC 6455 ping frames keep idle WebSockets alive and reap dead ones
+    options = {
+        "ws": "websockets",
+        "ws_ping_interval": 20.0,
+        "ws_ping_timeout": 20.0,
+        "log_config": log_config(),
+    }
+    if sys.platform == "win32":
+        return options
+    try:
+        import uvloop  # noqa: F401
+        options["loop"] = "uvloop"
+    except ImportError:
+        pass
+    try:
+        import httptools  # noqa: F401
+        options["http"] = "httptools"
+    except ImportError:
+        pass
+    return options
 
 
 def main():
@@ -54,7 +87,8 @@ def main():
         port=args.port,
         reload=args.dev,
         reload_dirs=[str(root_dir / "web_ui")] if args.dev else None,
-        log_level="info"
+        log_level="info",
+        **server_options()
     )
 
 
@@ -3,6 +3,7 @@
 Test script to verify all imports work correctly.
 """
 import sys
+from collections.abc import Mapping
 from pathlib import Path
 
 # Add parent directory to path (like run.py does)
@@ -46,7 +47,7 @@ try:
 
     print("\n6. Testing trainer service state...")
     state = service1.get_state()
-    assert isinstance(state, dict), "State should be a dict"
+    assert isinstance(state, Mapping), "State should be a mapping"
     assert 'is_training' in state, "State should have is_training"
     assert 'status' in state, "State should have status"
     print(f"   ✓ Initial state: {state}")